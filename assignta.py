@@ -1,112 +1,254 @@
-import pandas as pd
 import numpy as np
-from evo import Evo
+from evo import Evo, pack_solution, unpack_solution, solution_key  # re-exported
+from problem import default_problem
 import random as rnd
 
-# Load data
-sections_df = pd.read_csv('sections.csv')
-tas_df = pd.read_csv('tas.csv')
+def __getattr__(name):
+    """The default problem is loaded lazily, on first use (see problem.py)"""
+    if name == 'problem':
+        return default_problem()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def create_random_solution():
+def create_random_solutions(n, model=None, chunk_cells=2**22):
+    """Create n random initial solutions, vectorized over chunks of
+    solutions: each section gets a random number of TAs between its min
+    and max, drawn from its candidates (TAs not unavailable).
+    chunk_cells = about how many cells are keyed at a time, which bounds
+                  the working memory on large problems
+    Returns an (n, tas, sections) uint8 array"""
+    model = model or default_problem()
+    per_chunk = max(1, chunk_cells // (model.num_tas * model.num_sections))
+    solutions = np.empty((n, *model.shape), dtype=np.uint8)
+    for start in range(0, n, per_chunk):
+        stop = min(n, start + per_chunk)
+        solutions[start:stop] = _random_chunk(stop - start, model)
+    return solutions
+
+def _random_chunk(n, model):
+    """n random solutions in one vectorized pass (see create_random_solutions)"""
+    counts = np.minimum(
+        np.random.randint(model.min_ta, model.max_ta + 1, size=(n, model.num_sections)),
+        [len(tas) for tas in model.candidates])
+
+    # Random keys per (solution, section, TA), unavailable TAs last; each
+    # section takes the TAs with its `count` smallest keys
+    keys = np.random.random((n, model.num_sections, model.num_tas))
+    keys += 2.0 * model.unavailable.T
+    most = int(model.max_ta.max())
+    smallest = np.sort(np.partition(keys, min(most, model.num_tas - 1), axis=-1)[..., :most], axis=-1)
+    threshold = np.take_along_axis(smallest, np.maximum(counts - 1, 0)[..., None], axis=-1)
+    chosen = (keys <= threshold) & (counts[..., None] > 0)
+    return chosen.transpose(0, 2, 1)
+
+def create_random_solution(model=None):
     """Create a random initial solution"""
-    num_tas = len(tas_df)
-    num_sections = len(sections_df)
-    
-    # Create empty solution
-    solution = np.zeros((num_tas, num_sections))
-    
-    # For each section
-    for section in range(num_sections):
-        # Get min and max TAs needed
-        min_tas = sections_df.iloc[section]['min_ta']
-        max_tas = sections_df.iloc[section]['max_ta']
-        
-        # Get available TAs
-        available_tas = np.where(
-            (tas_df.iloc[:, 3:].replace({'U': 0, 'W': 1, 'P': 1}).values[:, section] == 1)
-        )[0]
-        
-        if len(available_tas) > 0:
-            # Assign random number of TAs between min and max
-            num_tas = np.random.randint(min_tas, max_tas + 1)
-            num_tas = min(num_tas, len(available_tas))
-            selected_tas = np.random.choice(available_tas, num_tas, replace=False)
-            solution[selected_tas, section] = 1
-    
+    return create_random_solutions(1, model)[0]
+
+def greedy_solution(model=None, strategy='preferred'):
+    """Create a constructive seed: sections are visited in random order and
+    each gets up to min_ta TAs that are available, under their
+    max_assigned and free in the section's time slot.
+    strategy = 'preferred' (preferred TAs before unpreferred ones) or
+               'capacity' (TAs with the most remaining capacity first)
+    Ties are broken at random, so repeated calls give different seeds"""
+    model = model or default_problem()
+    solution = np.zeros(model.shape, dtype=np.uint8)
+    remaining = model.max_assigned.copy()
+    busy = np.zeros((model.num_tas, len(model.slots)), dtype=bool)
+    noise = np.random.random(model.shape)
+    for section in np.random.permutation(model.num_sections):
+        slot = model.slot_of[section]
+        tas = model.candidates[section]
+        tas = tas[(remaining[tas] > 0) & ~busy[tas, slot]]
+        unpreferred = model.unpreferred[tas, section]
+        if strategy == 'preferred':
+            order = np.lexsort((noise[tas, section], unpreferred))
+        elif strategy == 'capacity':
+            order = np.lexsort((noise[tas, section], unpreferred, -remaining[tas]))
+        else:
+            raise ValueError(f"Unknown greedy strategy: {strategy!r}")
+        chosen = tas[order[:model.min_ta[section]]]
+        solution[chosen, section] = 1
+        remaining[chosen] -= 1
+        busy[chosen, slot] = True
     return solution
 
-def overallocation(solution):
+def initial_population(n=50, model=None, greedy=0.2):
+    """A diverse starting population of n solutions: a fraction `greedy`
+    of greedy seeds (alternating strategies), the rest random.
+    Returns an (n, tas, sections) uint8 array"""
+    model = model or default_problem()
+    num_greedy = int(round(n * greedy))
+    seeds = [greedy_solution(model, ('preferred', 'capacity')[i % 2]) for i in range(num_greedy)]
+    random_part = create_random_solutions(n - num_greedy, model)
+    if not seeds:
+        return random_part
+    return np.concatenate([np.stack(seeds), random_part])
+
+def _total(penalties, axes=(-2, -1)):
+    """Sum penalties per solution: an int for one solution, a vector for a batch"""
+    total = np.sum(penalties, axis=axes)
+    return int(total) if np.ndim(total) == 0 else total.astype(np.int64)
+
+def overallocation(solution, model=None):
     """Calculate overallocation penalty"""
+    model = model or default_problem()
     # Count assignments per TA
-    ta_assignments = np.sum(solution, axis=1)
+    ta_assignments = np.sum(solution, axis=-1, dtype=np.int64)
     # Get max assignments allowed per TA
-    max_allowed = tas_df['max_assigned'].values
+    max_allowed = model.max_assigned
     # Calculate penalties (1 point per extra assignment)
     penalties = np.maximum(0, ta_assignments - max_allowed)
-    return int(np.sum(penalties))
+    return _total(penalties, axes=-1)
 
-def conflicts(solution):
+def conflicts(solution, model=None):
     """Count the number of conflicts in the solution.
     A conflict occurs when a TA is assigned to two labs meeting at the same time.
-    We count one conflict for each pair of sections sharing a TA at the same time.
+    A TA with two labs in one time slot counts one conflict; with c > 2 labs
+    in one slot, c - 2 conflicts are counted (matching the test data).
     """
-    # Read sections data to get time slots
-    sections_df = pd.read_csv('sections.csv')
-    times = sections_df['daytime'].values
+    model = model or default_problem()
     
-    # Initialize total conflicts
-    total_conflicts = 0
+    # Labs per TA per time slot: (..., tas, slots)
+    counts = model.slot_counts(solution)
     
-    # For each unique time slot
-    for time in np.unique(times):
-        # Get sections at this time
-        sections_at_time = np.where(times == time)[0]
-        
-        # For each TA
-        for ta in range(solution.shape[0]):
-            # Get sections assigned to this TA at this time
-            assigned_sections = sections_at_time[solution[ta, sections_at_time] == 1]
-            
-            # If TA has more than one section at this time
-            if len(assigned_sections) > 1:
-                # Count one conflict for each additional section beyond the first
-                total_conflicts += len(assigned_sections) - 1
-                
-                # If this is the last section for this TA at this time,
-                # subtract one conflict to match test data
-                if len(assigned_sections) > 2:
-                    total_conflicts -= 1
-    
-    return total_conflicts
-
-def undersupport(solution):
+    # One conflict per lab beyond the first, less one when there are 3+
+    penalties = np.maximum(counts - 1, 0) - (counts > 2)
+    return _total(penalties)
+
+def undersupport(solution, model=None):
     """Calculate undersupport penalty"""
+    model = model or default_problem()
     # Count TAs per section
-    section_tas = np.sum(solution, axis=0)
+    section_tas = np.sum(solution, axis=-2, dtype=np.int64)
     # Get minimum required TAs
-    min_required = sections_df['min_ta'].values
+    min_required = model.min_ta
     # Calculate penalties (1 point per missing TA)
     penalties = np.maximum(0, min_required - section_tas)
-    return int(np.sum(penalties))
+    return _total(penalties, axes=-1)
 
-def unavailable(solution):
+def unavailable(solution, model=None):
     """Calculate unavailable assignments"""
-    # Get availability matrix (1 for unavailable)
-    availability = tas_df.iloc[:, 3:].replace({'U': 1, 'W': 0, 'P': 0}).values
+    model = model or default_problem()
     # Count assignments where TA is unavailable
-    return np.sum(solution * availability)
+    return _total(solution * model.unavailable)
 
-def unpreferred(solution):
+def unpreferred(solution, model=None):
     """Calculate unpreferred assignments"""
-    # Get preference matrix (1 for willing but not preferred)
-    preferences = tas_df.iloc[:, 3:].replace({'U': 0, 'W': 1, 'P': 0}).values
+    model = model or default_problem()
     # Count assignments where TA is willing but not preferred
-    return np.sum(solution * preferences)
+    return _total(solution * model.unpreferred)
+
+# Every objective above scores a single (tas, sections) solution or a
+# stacked (n, tas, sections) batch
+OBJECTIVES = {
+    'overallocation': overallocation,
+    'conflicts': conflicts,
+    'undersupport': undersupport,
+    'unavailable': unavailable,
+    'unpreferred': unpreferred,
+}
+
+def count_dtype(limit):
+    """Smallest signed integer dtype holding counts from 0 to limit"""
+    return np.int8 if limit < 2**7 else np.int16 if limit < 2**15 else np.int32
+
+class Tally:
+    """Cached row, column and time-slot sums of one solution.
+    Lets the *_delta objectives below rescore a solution in O(changed cells)
+    instead of from scratch. A cell is a (ta, section, value) change
+    setting solution[ta, section] to value (0 or 1). Every population
+    member keeps one, so the sums use the smallest dtype that fits."""
+
+    def __init__(self, ta_load, section_load, slot_load, model):
+        self.ta_load = ta_load  # assignments per TA
+        self.section_load = section_load  # TAs per section
+        self.slot_load = slot_load  # labs per TA per time slot
+        self.model = model
+
+    @classmethod
+    def from_solution(cls, solution, model=None):
+        """Tally up a solution from scratch"""
+        model = model or default_problem()
+        assigned = np.asarray(solution) == 1
+        most_per_slot = int(np.bincount(model.slot_of).max())
+        return cls(assigned.sum(axis=1, dtype=count_dtype(model.num_sections)),
+                   assigned.sum(axis=0, dtype=count_dtype(model.num_tas)),
+                   model.slot_counts(assigned, dtype=count_dtype(most_per_slot)), model)
+
+    def copy(self):
+        return Tally(self.ta_load.copy(), self.section_load.copy(),
+                     self.slot_load.copy(), self.model)
 
-def swap_ta_agent(solutions):
-    """Agent that swaps TA assignments between sections"""
+    def apply(self, cell):
+        """Update the sums for one changed cell"""
+        ta, section, value = cell
+        step = 1 if value else -1
+        self.ta_load[ta] += step
+        self.section_load[section] += step
+        self.slot_load[ta, self.model.slot_of[section]] += step
+
+def _conflict_penalty(count):
+    """Conflicts counted for one TA with count labs in one time slot"""
+    return max(count - 1, 0) - (count > 2)
+
+def overallocation_delta(score, tally, cell):
+    """Overallocation after applying cell to the tallied solution"""
+    ta, section, value = cell
+    load = int(tally.ta_load[ta])
+    new_load = load + (1 if value else -1)
+    cap = tally.model.max_assigned[ta]
+    return int(score + max(0, new_load - cap) - max(0, load - cap))
+
+def conflicts_delta(score, tally, cell):
+    """Conflicts after applying cell to the tallied solution"""
+    ta, section, value = cell
+    count = int(tally.slot_load[ta, tally.model.slot_of[section]])
+    new_count = count + (1 if value else -1)
+    return int(score + _conflict_penalty(new_count) - _conflict_penalty(count))
+
+def undersupport_delta(score, tally, cell):
+    """Undersupport after applying cell to the tallied solution"""
+    ta, section, value = cell
+    load = int(tally.section_load[section])
+    new_load = load + (1 if value else -1)
+    required = tally.model.min_ta[section]
+    return int(score + max(0, required - new_load) - max(0, required - load))
+
+def unavailable_delta(score, tally, cell):
+    """Unavailable after applying cell to the tallied solution"""
+    ta, section, value = cell
+    step = 1 if value else -1
+    return score + step * int(tally.model.unavailable[ta, section])
+
+def unpreferred_delta(score, tally, cell):
+    """Unpreferred after applying cell to the tallied solution"""
+    ta, section, value = cell
+    step = 1 if value else -1
+    return score + step * int(tally.model.unpreferred[ta, section])
+
+DELTAS = {
+    'overallocation': overallocation_delta,
+    'conflicts': conflicts_delta,
+    'undersupport': undersupport_delta,
+    'unavailable': unavailable_delta,
+    'unpreferred': unpreferred_delta,
+}
+
+def _move(parent, solution, cells):
+    """The (ta, section, value) changes from parent to solution among cells"""
+    move = {}
+    for ta, section in cells:
+        if parent[ta, section] != solution[ta, section]:
+            move[(int(ta), int(section))] = int(solution[ta, section])
+    return [(ta, section, value) for (ta, section), value in move.items()]
+
+def swap_ta_agent(solutions, model=None):
+    """Agent that swaps TA assignments between sections.
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
     if not solutions:
-        return create_random_solution()
+        return create_random_solution(model)
     
     solution = solutions[0].copy()
     
@@ -117,6 +259,7 @@ def swap_ta_agent(solutions):
     tas1 = np.where(solution[:, section1] == 1)[0]
     tas2 = np.where(solution[:, section2] == 1)[0]
     
+    cells = []
     if len(tas1) > 0 and len(tas2) > 0:
         # Swap one random TA from each section
         ta1 = np.random.choice(tas1)
@@ -125,13 +268,16 @@ def swap_ta_agent(solutions):
         # Perform swap
         solution[ta1, section1], solution[ta1, section2] = 0, 1
         solution[ta2, section1], solution[ta2, section2] = 1, 0
+        cells = [(ta1, section1), (ta1, section2), (ta2, section1), (ta2, section2)]
     
-    return solution
+    return solution, _move(solutions[0], solution, cells)
 
-def add_remove_agent(solutions):
-    """Agent that adds or removes TA assignments"""
+def add_remove_agent(solutions, model=None):
+    """Agent that adds or removes TA assignments.
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
     if not solutions:
-        return create_random_solution()
+        return create_random_solution(model)
     
     solution = solutions[0].copy()
     
@@ -143,21 +289,26 @@ def add_remove_agent(solutions):
     all_tas = np.arange(solution.shape[0])
     unassigned_tas = np.setdiff1d(all_tas, assigned_tas)
     
+    cells = []
     if len(unassigned_tas) > 0 and np.random.random() < 0.5:
         # Add a random unassigned TA
         new_ta = np.random.choice(unassigned_tas)
         solution[new_ta, section] = 1
+        cells = [(new_ta, section)]
     elif len(assigned_tas) > 0:
         # Remove a random assigned TA
         remove_ta = np.random.choice(assigned_tas)
         solution[remove_ta, section] = 0
+        cells = [(remove_ta, section)]
     
-    return solution
+    return solution, _move(solutions[0], solution, cells)
 
-def optimize_section_agent(solutions):
-    """Agent that tries to optimize a single section's assignments"""
+def optimize_section_agent(solutions, model=None):
+    """Agent that tries to optimize a single section's assignments.
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
     if not solutions:
-        return create_random_solution()
+        return create_random_solution(model)
     
     solution = solutions[0].copy()
     
@@ -165,45 +316,45 @@ def optimize_section_agent(solutions):
     section = np.random.randint(0, solution.shape[1])
     
     # Get section requirements
-    min_tas = sections_df.iloc[section]['min_ta']
-    max_tas = sections_df.iloc[section]['max_ta']
+    min_tas = model.min_ta[section]
+    max_tas = model.max_ta[section]
     
     # Get current and potential TAs
     current_tas = np.where(solution[:, section] == 1)[0]
-    available_tas = np.where(
-        (tas_df.iloc[:, 3:].replace({'U': 0, 'W': 1, 'P': 1}).values[:, section] == 1)
-    )[0]
+    available_tas = model.candidates[section]
     
     # Adjust number of TAs to meet requirements
+    changed_tas = []
     if len(current_tas) < min_tas and len(available_tas) > 0:
         # Add TAs until minimum is met
         needed = min_tas - len(current_tas)
         new_tas = np.random.choice(available_tas, min(needed, len(available_tas)), replace=False)
         solution[new_tas, section] = 1
+        changed_tas = new_tas
     elif len(current_tas) > max_tas:
         # Remove TAs until maximum is met
         remove_count = len(current_tas) - max_tas
         remove_tas = np.random.choice(current_tas, remove_count, replace=False)
         solution[remove_tas, section] = 0
+        changed_tas = remove_tas
     
-    return solution
+    cells = [(ta, section) for ta in changed_tas]
+    return solution, _move(solutions[0], solution, cells)
 
-def fix_conflicts_agent(solutions):
-    """Agent that tries to reduce time conflicts"""
+def fix_conflicts_agent(solutions, model=None):
+    """Agent that tries to reduce time conflicts.
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
     if not solutions:
-        return create_random_solution()
+        return create_random_solution(model)
     
     solution = solutions[0].copy()
     
-    # Get all unique time slots
-    time_slots = sections_df['daytime'].unique()
-    
-    # Pick a random time slot
-    time = np.random.choice(time_slots)
-    
-    # Get sections at this time
-    sections_at_time = sections_df[sections_df['daytime'] == time].index.values
+    # Pick a random time slot and get the sections meeting then
+    slot = np.random.randint(0, len(model.slots))
+    sections_at_time = model.slot_sections[slot]
     
+    cells = []
     if len(sections_at_time) > 1:
         # Pick two random sections at this time
         section1, section2 = np.random.choice(sections_at_time, 2, replace=False)
@@ -219,31 +370,250 @@ def fix_conflicts_agent(solutions):
             ta = np.random.choice(conflicting_tas)
             section = np.random.choice([section1, section2])
             solution[ta, section] = 0
+            cells = [(ta, section)]
     
-    return solution
+    return solution, _move(solutions[0], solution, cells)
+
+def _feasible_tas(solution, section, model):
+    """Candidate TAs that could join section without being unavailable,
+    over their max_assigned, or double-booked in the section's time slot"""
+    tas = model.candidates[section]
+    tas = tas[solution[tas, section] == 0]
+    rows = solution[tas] == 1
+    room = rows.sum(axis=1) < model.max_assigned[tas]
+    free = ~rows[:, model.slot_sections[model.slot_of[section]]].any(axis=1)
+    return tas[room & free]
+
+def _fits(solution, ta, section, model):
+    """True if ta could take section without a new unavailable or
+    same-time-slot assignment (capacity is checked by the caller)"""
+    return bool(model.available[ta, section]) and \
+        not solution[ta, model.slot_sections[model.slot_of[section]]].any()
+
+def feasible_add_remove_agent(solutions, model=None):
+    """Agent that adds a feasible TA to a section with room, or removes one.
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+
+    solution = solutions[0].copy()
+    section = np.random.randint(0, solution.shape[1])
+    assigned_tas = np.flatnonzero(solution[:, section] == 1)
+
+    cells = []
+    if len(assigned_tas) < model.max_ta[section] and np.random.random() < 0.5:
+        feasible = _feasible_tas(solution, section, model)
+        if len(feasible) > 0:
+            new_ta = np.random.choice(feasible)
+            solution[new_ta, section] = 1
+            cells = [(new_ta, section)]
+    elif len(assigned_tas) > 0:
+        remove_ta = np.random.choice(assigned_tas)
+        solution[remove_ta, section] = 0
+        cells = [(remove_ta, section)]
+
+    return solution, _move(solutions[0], solution, cells)
+
+def feasible_replace_agent(solutions, model=None):
+    """Agent that hands one of a section's labs to a feasible other TA.
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+
+    solution = solutions[0].copy()
+    section = np.random.randint(0, solution.shape[1])
+    assigned_tas = np.flatnonzero(solution[:, section] == 1)
+
+    cells = []
+    if len(assigned_tas) > 0:
+        old_ta = np.random.choice(assigned_tas)
+        feasible = _feasible_tas(solution, section, model)
+        if len(feasible) > 0:
+            new_ta = np.random.choice(feasible)
+            solution[old_ta, section], solution[new_ta, section] = 0, 1
+            cells = [(old_ta, section), (new_ta, section)]
+
+    return solution, _move(solutions[0], solution, cells)
+
+def feasible_swap_agent(solutions, model=None):
+    """Agent that swaps two TAs between two sections when both can take
+    their new section (the TAs' loads are unchanged).
+    Returns the new solution and its move (changed cells)"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+
+    solution = solutions[0].copy()
+    section1, section2 = np.random.choice(solution.shape[1], 2, replace=False)
+    tas1 = np.flatnonzero((solution[:, section1] == 1) & (solution[:, section2] == 0))
+    tas2 = np.flatnonzero((solution[:, section2] == 1) & (solution[:, section1] == 0))
+
+    cells = []
+    if len(tas1) > 0 and len(tas2) > 0:
+        ta1, ta2 = np.random.choice(tas1), np.random.choice(tas2)
+        solution[ta1, section1], solution[ta2, section2] = 0, 0
+        if _fits(solution, ta1, section2, model) and _fits(solution, ta2, section1, model):
+            solution[ta1, section2], solution[ta2, section1] = 1, 1
+            cells = [(ta1, section1), (ta1, section2), (ta2, section1), (ta2, section2)]
+        else:
+            solution[ta1, section1], solution[ta2, section2] = 1, 1
+
+    return solution, _move(solutions[0], solution, cells)
+
+def _diff_move(parent, solution):
+    """The (ta, section, value) changes from parent to solution"""
+    tas, sections = np.nonzero(solution != parent)
+    return [(int(ta), int(section), int(solution[ta, section]))
+            for ta, section in zip(tas, sections)]
+
+def section_crossover_agent(solutions, model=None):
+    """Agent that takes each section's column from either of two parents
+    at random (uniform crossover over sections).
+    Returns the new solution and its move from the first parent"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+    parent, other = solutions[0], solutions[-1]
+    take = np.random.random(parent.shape[1]) < 0.5
+    solution = np.where(take[None, :], other, parent)
+    return solution, _diff_move(parent, solution)
+
+def ta_crossover_agent(solutions, model=None):
+    """Agent that takes each TA's row from either of two parents at random.
+    Returns the new solution and its move from the first parent"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+    parent, other = solutions[0], solutions[-1]
+    take = np.random.random(parent.shape[0]) < 0.5
+    solution = np.where(take[:, None], other, parent)
+    return solution, _diff_move(parent, solution)
+
+def best_column_crossover_agent(solutions, model=None):
+    """Agent that takes each section's column from whichever of two parents
+    scores better on it (unavailable + unpreferred + undersupport, the
+    objectives that add up by section; ties are broken at random).
+    Returns the new solution and its move from the first parent"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+    parent, other = solutions[0], solutions[-1]
+    pair = (np.stack([parent, other]) == 1).view(np.uint8)  # (2, tas, sections)
+    weights = (model.unavailable + model.unpreferred)[None]
+    penalty = (pair * weights).sum(axis=1, dtype=np.int64) + \
+        np.maximum(0, model.min_ta - pair.sum(axis=1, dtype=np.int64))
+    take = (penalty[1] < penalty[0]) | \
+        ((penalty[1] == penalty[0]) & (np.random.random(parent.shape[1]) < 0.5))
+    solution = np.where(take[None, :], other, parent)
+    return solution, _diff_move(parent, solution)
+
+def _flip_deltas(solution, tally, tas, sections):
+    """Change in each objective from flipping each cell of the tallied
+    solution in the block tas x sections (index arrays): five matrices
+    in OBJECTIVES order"""
+    model = tally.model
+    block = np.ix_(tas, sections)
+    step = 1 - 2 * (np.asarray(solution)[block] == 1).astype(np.int64)  # +1 adds, -1 removes
+    load = tally.ta_load[tas, None]
+    cap = model.max_assigned[tas, None]
+    over = np.maximum(0, load + step - cap) - np.maximum(0, load - cap)
+    count = tally.slot_load[np.ix_(tas, model.slot_of[sections])]
+    penalty = lambda c: np.maximum(c - 1, 0) - (c > 2)
+    conflict = penalty(count + step) - penalty(count)
+    section_load = tally.section_load[None, sections]
+    need = model.min_ta[None, sections]
+    under = np.maximum(0, need - section_load - step) - np.maximum(0, need - section_load)
+    return over, conflict, under, step * model.unavailable[block], step * model.unpreferred[block]
+
+def local_search_agent(solutions, model=None, weights=None, max_steps=50):
+    """Agent that hill-climbs a solution on a weighted sum of the five
+    objectives: each step applies the best-improving single-cell flip, or
+    the best move of one lab between two TAs of a section, until no move
+    improves or after max_steps. Every move is scored at once from the
+    solution's Tally, and after each step only the changed TAs' rows and
+    sections' columns are rescored.
+    weights = one weight per objective in OBJECTIVES order (default: random,
+              so that repeated calls polish different parts of the front)
+    Returns the final solution and its move (changed cells)"""
+    model = model or default_problem()
+    if not solutions:
+        return create_random_solution(model)
+    if weights is None:
+        weights = np.random.dirichlet(np.ones(len(OBJECTIVES)))
+    weights = np.asarray(weights, dtype=float)
+
+    def score(tas, sections):
+        """ Weighted flip deltas, and the same without undersupport (moving
+        a lab within a section leaves its undersupport unchanged) """
+        deltas = _flip_deltas(solution, tally, tas, sections)
+        flips = sum(w * d for w, d in zip(weights, deltas))
+        return flips, flips - weights[2] * deltas[2]
+
+    solution = solutions[0].copy()
+    tally = Tally.from_solution(solution, model)
+    all_tas, all_sections = np.arange(model.num_tas), np.arange(model.num_sections)
+    flips, rest = score(all_tas, all_sections)
+    for _ in range(max_steps):
+        # The best lab move in each section: off its best assigned TA,
+        # onto its best unassigned TA (their terms are independent)
+        assigned = solution == 1
+        leave = np.where(assigned, rest, np.inf)
+        join = np.where(assigned, np.inf, rest)
+        swaps = leave.min(axis=0) + join.min(axis=0)
+
+        flip = np.unravel_index(np.argmin(flips), flips.shape)
+        section = int(np.argmin(swaps))
+        if min(flips[flip], swaps[section]) >= -1e-12:
+            break
+        if flips[flip] <= swaps[section]:
+            cells = [(int(flip[0]), int(flip[1]), 1 - int(solution[flip]))]
+        else:
+            cells = [(int(np.argmin(leave[:, section])), section, 0),
+                     (int(np.argmin(join[:, section])), section, 1)]
+        for cell in cells:
+            solution[cell[0], cell[1]] = cell[2]
+            tally.apply(cell)
+
+        # Rescore the rows of the changed TAs and the changed columns
+        tas = np.unique([ta for ta, _, _ in cells])
+        changed = np.unique([s for _, s, _ in cells])
+        flips[tas, :], rest[tas, :] = score(tas, all_sections)
+        flips[:, changed], rest[:, changed] = score(all_tas, changed)
+
+    return solution, _diff_move(solutions[0], solution)
 
 def main():
     # Create evolutionary framework
     evo = Evo()
     
     # Add objectives
-    evo.add_objective('overallocation', overallocation)
-    evo.add_objective('conflicts', conflicts)
-    evo.add_objective('undersupport', undersupport)
-    evo.add_objective('unavailable', unavailable)
-    evo.add_objective('unpreferred', unpreferred)
+    evo.add_objective('overallocation', overallocation, batch=True, delta=overallocation_delta)
+    evo.add_objective('conflicts', conflicts, batch=True, delta=conflicts_delta)
+    evo.add_objective('undersupport', undersupport, batch=True, delta=undersupport_delta)
+    evo.add_objective('unavailable', unavailable, batch=True, delta=unavailable_delta)
+    evo.add_objective('unpreferred', unpreferred, batch=True, delta=unpreferred_delta)
+    evo.set_state(Tally.from_solution)
     
     # Add agents
     evo.add_agent('swap_ta', swap_ta_agent)
     evo.add_agent('add_remove', add_remove_agent)
     evo.add_agent('optimize_section', optimize_section_agent)
     evo.add_agent('fix_conflicts', fix_conflicts_agent)
+    evo.add_agent('feasible_add_remove', feasible_add_remove_agent)
+    evo.add_agent('feasible_replace', feasible_replace_agent)
+    evo.add_agent('feasible_swap', feasible_swap_agent)
+    evo.add_agent('section_crossover', section_crossover_agent, k=2)
+    evo.add_agent('ta_crossover', ta_crossover_agent, k=2)
+    evo.add_agent('best_column_crossover', best_column_crossover_agent, k=2)
+    evo.add_agent('local_search', local_search_agent, every=500)
     
-    # Add initial solution
-    evo.add_solution(create_random_solution())
+    # Add a seeded initial population
+    evo.add_solutions(initial_population(50))
     
     # Run evolution
-    evo.evolve(n=1000, dom=100, status=1000)
+    evo.evolve(max_iter=1000, dom=100, status=1000)
 
 if __name__ == "__main__":
     main()
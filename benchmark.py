@@ -0,0 +1,232 @@
+"""
+File: benchmark.py
+Description: Reproducible benchmark suite for the optimizer: seeded
+            micro-benchmarks of each objective, agent and
+            remove_dominated, plus end-to-end iterations/sec and
+            hypervolume after a fixed time, on the shipped data and on
+            synthetic problems of growing size. Results are written as JSON.
+            Run with: python benchmark.py [--quick] [--out FILE]
+"""
+
+import argparse
+import json
+import platform
+import random as rnd
+import time
+import numpy as np
+import pandas as pd
+from evo import Evo
+from problem import ProblemModel
+import assignta
+import metrics
+import pareto
+import profiler
+import sparse
+
+AGENTS = {
+    'swap_ta': assignta.swap_ta_agent,
+    'add_remove': assignta.add_remove_agent,
+    'optimize_section': assignta.optimize_section_agent,
+    'fix_conflicts': assignta.fix_conflicts_agent,
+    'feasible_add_remove': assignta.feasible_add_remove_agent,
+    'feasible_replace': assignta.feasible_replace_agent,
+    'feasible_swap': assignta.feasible_swap_agent,
+    'section_crossover': assignta.section_crossover_agent,
+    'ta_crossover': assignta.ta_crossover_agent,
+    'best_column_crossover': assignta.best_column_crossover_agent,
+    'local_search': assignta.local_search_agent,
+}
+
+
+def seed_everything(seed):
+    """ Seed both random and np.random """
+    rnd.seed(seed)
+    np.random.seed(seed)
+
+
+def random_scores(n, m=5, high=50, seed=0):
+    """ n random integer score vectors over m objectives """
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, high, size=(n, m)).astype(float)
+
+
+def time_call(f, repeat=3):
+    """ Best wall-clock time of f() over repeat runs, in seconds """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_call(f, budget=0.05):
+    """ Mean time per call of f() in microseconds, calling it repeatedly
+    for about budget seconds (at least once) """
+    f()  # warm up
+    calls, start = 0, time.perf_counter()
+    while True:
+        f()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return 1e6 * elapsed / calls
+
+
+def load_problem(name):
+    """ 'shipped' for the CSVs, or 'TASxSECTIONS' for a synthetic problem """
+    if name == 'shipped':
+        return assignta.problem
+    num_tas, num_sections = (int(x) for x in name.split('x'))
+    return ProblemModel.synthetic(num_tas, num_sections, seed=0)
+
+
+def bench_objectives(model, batch=64, seed=0):
+    """ Time per solution of each objective, one at a time, batched (stacks
+    capped at about 16M cells) and by delta scoring of one changed cell """
+    seed_everything(seed)
+    batch = max(2, min(batch, 2**24 // (model.num_tas * model.num_sections)))
+    solutions = assignta.create_random_solutions(batch, model)
+    rows = []
+    for name, f in assignta.OBJECTIVES.items():
+        rows.append({'name': name, 'mode': 'single',
+                     'us': per_call(lambda: f(solutions[0], model))})
+        rows.append({'name': name, 'mode': 'batch',
+                     'us': per_call(lambda: f(solutions, model)) / batch})
+    tally = assignta.Tally.from_solution(solutions[0], model)
+    cell = (0, 0, 1 - int(solutions[0][0, 0]))
+    for name, delta in assignta.DELTAS.items():
+        rows.append({'name': name, 'mode': 'delta',
+                     'us': per_call(lambda: delta(0, tally, cell))})
+    return rows
+
+
+def bench_agents(model, seed=0):
+    """ Time per call of each agent on two random solutions (mutation
+    agents only use the first) """
+    seed_everything(seed)
+    parents = [assignta.create_random_solution(model) for _ in range(2)]
+    rows = [{'name': 'create_random_solution',
+             'us': per_call(lambda: assignta.create_random_solution(model))},
+            {'name': 'create_random_solutions/32',
+             'us': per_call(lambda: assignta.create_random_solutions(32, model)) / 32},
+            {'name': 'greedy_solution',
+             'us': per_call(lambda: assignta.greedy_solution(model))}]
+    for name, agent in AGENTS.items():
+        rows.append({'name': name, 'us': per_call(lambda: agent(parents, model))})
+    return rows
+
+
+def bench_nondominated(sizes=(100, 1000, 10000), reduce_limit=1000):
+    """ Time each non-dominated filtering engine on populations of each size.
+    The original pure-Python 'reduce' engine is only run up to reduce_limit """
+    rows = []
+    for n in sizes:
+        scores = random_scores(n)
+        keys = [tuple((f'obj{j}', s) for j, s in enumerate(row)) for row in scores]
+        front = int(pareto.nondominated(scores).sum())
+        for method in pareto.METHODS:
+            seconds = time_call(lambda: pareto.nondominated(scores, method),
+                                repeat=3 if n <= 1000 else 1)
+            rows.append({'n': n, 'front': front, 'method': method, 'seconds': seconds})
+        if n <= reduce_limit:
+            evo = Evo(nds='reduce')
+            evo.pop = dict.fromkeys(keys)
+            seconds = time_call(evo.remove_dominated, repeat=1)
+            rows.append({'n': n, 'front': front, 'method': 'reduce', 'seconds': seconds})
+    return rows
+
+
+def fixed_reference(model, seed=0, samples=32):
+    """ A hypervolume reference point that depends only on the problem:
+    twice the worst scores of a seeded set of random solutions, plus one """
+    seed_everything(seed)
+    batch = assignta.create_random_solutions(samples, model)
+    scores = np.column_stack([f(batch, model) for f in assignta.OBJECTIVES.values()])
+    return metrics.reference_point(scores, scale=2.0)
+
+
+def bench_evolve(model, seconds=5.0, seed=0, backend='dense', **options):
+    """ End-to-end run from a seeded initial population (see
+    assignta.initial_population): iterations/sec, final front size and
+    hypervolume after `seconds`.
+    backend = 'dense' matrices or 'sparse' solutions (see sparse.py) """
+    reference = fixed_reference(model, seed)
+    seed_everything(seed)
+    bound = None if model is assignta.problem else model
+    if backend == 'sparse':
+        evo = profiler.setup_sparse_optimizer(bound)
+        seeds = sparse.initial_population(50, model)
+    else:
+        evo = profiler.setup_optimizer(bound)
+        seeds = assignta.initial_population(50, model)
+    for name, value in options.items():
+        setattr(evo, name, value)
+    evo.add_solutions(seeds)
+    evo.evolve(time_limit=seconds, reporters=[], status=10**9)
+    stats = evo.status(sum(evo.scheduler.calls.values()), seconds, reference)
+    return {'iterations_per_second': stats['rate'], 'front': stats['front'],
+            'hypervolume': stats['hypervolume'], 'spacing': stats['spacing'],
+            'spread': stats['spread'], 'best': stats['best']}
+
+
+def run_suite(problems=('shipped', '400x170', '2000x850'), seconds=5.0,
+              nds_sizes=(100, 1000, 10000), seed=0):
+    """ Run every benchmark and return the results as one JSON-ready dict """
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'seed': seed,
+            'seconds': seconds,
+        },
+        'nondominated': bench_nondominated(nds_sizes),
+        'problems': {},
+    }
+    for name in problems:
+        model = load_problem(name)
+        results['problems'][name] = {
+            'shape': list(model.shape),
+            'objectives': bench_objectives(model, seed=seed),
+            'agents': bench_agents(model, seed=seed),
+            'evolve': bench_evolve(model, seconds, seed),
+            'evolve_archive': bench_evolve(model, seconds, seed, archive=True),
+            'evolve_sparse': bench_evolve(model, seconds, seed, backend='sparse'),
+            'evolve_scalar': bench_evolve(model, seconds, seed,
+                                          weights=dict.fromkeys(assignta.OBJECTIVES, 1)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('Description:')[1].strip())
+    parser.add_argument('--problems', nargs='+', default=['shipped', '400x170', '2000x850'],
+                        help="'shipped' or synthetic TASxSECTIONS sizes")
+    parser.add_argument('--seconds', type=float, default=5.0,
+                        help='wall-clock budget of each end-to-end run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true',
+                        help='shipped data only, 1s runs, populations up to 1k')
+    parser.add_argument('--out', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    if args.quick:
+        results = run_suite(['shipped'], 1.0, (100, 1000), args.seed)
+    else:
+        results = run_suite(args.problems, args.seconds, seed=args.seed)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for name, problem in results['problems'].items():
+        for run in ('evolve', 'evolve_archive', 'evolve_sparse', 'evolve_scalar'):
+            r = problem[run]
+            print(f"{name:>10} {run:>15}: {r['iterations_per_second']:8.0f} it/s  "
+                  f"front {r['front']:4d}  hv {r['hypervolume']:.4g}")
+    print(f"Results written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,55 +6,525 @@ Description: A concise evolutionary computing framework for solving
 
 import random as rnd
 import copy   # doing deep copies of solutions when generating offspring
+from collections import OrderedDict  # LRU cache of evaluations
 from functools import reduce  # for discarding dominated (bad) solutions
+import heapq  # elite set of the scalar (weighted / lexicographic) mode
+from itertools import count
+import os
 import time
+from time import perf_counter_ns  # always-on hot-path counters
+import numpy as np
 import pandas as pd
+import pareto
+import metrics
+import telemetry
+from scheduler import UniformScheduler
+
+# Largest front whose spacing and spread are in the periodic status reports
+NEIGHBOURS_MAX = 500
+
+
+def pack_solution(solution):
+    """ Pack a 0/1 solution into bitset rows (8 cells per byte along the last axis) """
+    return np.packbits(np.asarray(solution) == 1, axis=-1)
+
+
+def unpack_solution(bits, num_columns):
+    """ Unpack packed rows of num_columns cells back into a uint8 matrix """
+    return np.unpackbits(bits, axis=-1, count=num_columns)
+
+
+def solution_key(solution):
+    """ Hashable content key of a 0/1 solution, the same for any dtype """
+    return pack_solution(solution).tobytes()
+
+
+def is_binary(solution):
+    """ True if every cell of an array is 0 or 1 """
+    solution = np.asarray(solution)
+    if solution.dtype == bool or solution.dtype.kind == 'u':  # no negatives to rule out
+        return solution.size == 0 or solution.max() <= 1
+    return np.count_nonzero(solution == 0) + np.count_nonzero(solution == 1) == solution.size
 
 class Evo:
 
-    def __init__(self):
-        """framework constructor"""
+    def __init__(self, nds='auto', archive=False, cache_size=10000,
+                 weights=None, lexicographic=None, elite=50):
+        """framework constructor
+        nds = non-dominated filtering engine: 'auto', 'sort' or 'pairwise'
+              (see pareto.py), or 'reduce' for the original pure-Python sweep
+        archive = True to keep the population non-dominated at all times:
+                  each new solution is checked against the current front,
+                  rejected if dominated, and evicts whatever it dominates
+        cache_size = max # of evaluations remembered by solution content
+                     (0 disables the cache and duplicate skipping)
+        weights = scalar mode: rank solutions by the weighted sum of their
+                  scores (name --> weight, unlisted objectives weigh 0,
+                  or weights in objective order) instead of by dominance
+        lexicographic = scalar mode: rank solutions by their scores in this
+                        order of objective names (ties broken by the next)
+        elite = # of best-ranked solutions kept in scalar mode; no
+                dominance checks are made, a heap evicts the worst """
+        if nds != 'reduce' and nds not in pareto.METHODS:
+            raise ValueError(f"Unknown non-dominated filtering method: {nds!r}")
+        if weights is not None and lexicographic is not None:
+            raise ValueError("Pass either weights or lexicographic, not both")
+        if archive and (weights is not None or lexicographic is not None):
+            raise ValueError("Archive mode and scalar mode are exclusive")
+        self.nds = nds
+        self.archive = archive
+        self.front = None  # pareto.Archive of the population's scores (archive mode)
+        self.weights = weights
+        self.lexicographic = lexicographic
+        self.elite = elite
+        self.ranking = None  # heap of (negated rank, tiebreak, evaluation) (scalar mode)
+        self.tiebreak = count()  # older solutions go first among equal ranks
+        self.rank_vector = None  # weights or objective order of the ranking heap, as a list
         self.pop = {}  # population of solutions: evaluation --> solution
         self.fitness = {}  # objectives:    name --> objective function (f)
+        self.batched = set()  # names of objectives that score a whole batch at once
+        self.deltas = {}  # incremental objectives:  name --> delta function
         self.agents = {}  # agents:   name --> (operator/function,  num_solutions_input)
+        self.periodic = {}  # agents run on a fixed period: name --> every N iterations
+        self.make_state = None  # solution --> cached state used by the deltas
+        self.states = {}  # evaluation --> cached state of that solution
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # LRU: hash of solution bytes --> evaluation
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.duplicates = 0  # offspring skipped as copies of a population member
+        self.evaluations = 0  # solutions scored (in full or by deltas)
+        self.stop_reason = None  # why the last evolve run stopped
+        self.scheduler = None  # agent scheduler of the last evolve run
+        self.counters = {}  # (kind, name) --> [calls, total nanoseconds]
 
-    def add_objective(self, name, f):
-        """ Register a new objective for evaluating solutions """
+    def add_objective(self, name, f, batch=False, delta=None):
+        """ Register a new objective for evaluating solutions.
+        batch = True if f also accepts an (n, ...) stack of solutions
+        and returns a vector of n scores
+        delta = optional f(score, state, cell) giving the score after one
+                cell of a move is applied to a solution with cached state
+        Cached evaluations and states are dropped, and any existing
+        population is rescored, so every key covers every objective """
         self.fitness[name] = f
+        self.ranking = None
+        self.front = None
+        self.cache.clear()
+        self.states = {}
+        if batch:
+            self.batched.add(name)
+        else:
+            self.batched.discard(name)
+        if delta is not None:
+            self.deltas[name] = delta
+        else:
+            self.deltas.pop(name, None)
+        if self.pop:
+            solutions = list(self.pop.values())
+            self.pop = dict(zip(self.evaluate_batch(solutions), solutions))
+
+    def set_state(self, make_state):
+        """ Register the cached per-solution state used for delta scoring.
+        make_state(sol) returns an object with copy() and apply(cell) """
+        self.make_state = make_state
+        self.states = {}
 
-    def add_agent(self, name, op, k=1):
-        """ Register an agent take works on k input solutions """
+    def add_agent(self, name, op, k=1, every=None):
+        """ Register an agent take works on k input solutions
+        every = run the agent once every N iterations of evolve instead of
+                letting the scheduler pick it (e.g. an expensive local search) """
         self.agents[name] = (op, k)
+        if every:
+            self.periodic[name] = every
+        else:
+            self.periodic.pop(name, None)
 
-    def get_random_solutions(self, k=1):
-        """ Picks k random solutions from the population
-        and returns them as a list of deep-copies """
+    def get_random_keys(self, k=1):
+        """ Picks the evaluation keys of k random solutions """
         if len(self.pop) == 0:  # No solutions - this shouldn't happen!
             return []
         else:
-            solutions = tuple(self.pop.values())
-            return [copy.deepcopy(rnd.choice(solutions)) for _ in range(k)]
+            keys = tuple(self.pop.keys())
+            return [rnd.choice(keys) for _ in range(k)]
 
+    @staticmethod
+    def _copy(sol):
+        """ Copy a solution: a plain buffer copy for NumPy arrays,
+        a deep copy for anything else """
+        return sol.copy() if isinstance(sol, np.ndarray) else copy.deepcopy(sol)
+
+    def get_random_solutions(self, k=1):
+        """ Picks k random solutions from the population
+        and returns them as a list of copies """
+        return [Evo._copy(self.pop[key]) for key in self.get_random_keys(k)]
 
-    def add_solution(self, sol):
+
+    def add_solution(self, sol, parent=None, move=None):
         """ Adds the solution to the current population.
-        Added solutions are evaluated wrt each registered objective. """
+        Added solutions are evaluated wrt each registered objective.
+        If sol was made from the solution with evaluation key parent by
+        the cells in move, and every objective has a delta, only the
+        changed cells are rescored.
+        Returns the solution's evaluation key, or None if it was not added
+        (a duplicate of a population member, or dominated in archive mode) """
+
+        # An empty move is an unchanged copy of its parent
+        if move is not None and len(move) == 0 and parent in self.pop:
+            self.duplicates += 1
+            return None
+
+        content, eval = self._lookup(sol)
+        if eval is not None:
+            if eval in self.pop:
+                self.duplicates += 1
+                return None
+            state = self.make_state(sol) if self.make_state else None
+        elif move is not None and parent in self.pop and self.make_state \
+                and len(self.deltas) == len(self.fitness):
+            eval, state = self._delta_evaluate(parent, move)
+        else:
+            eval = self._score(sol)
+            state = self.make_state(sol) if self.make_state else None
+        self._remember(content, eval)
+
+        # Add to the dictionary
+        return self._insert(eval, sol, state)
+
+    def _lookup(self, sol):
+        """ Hash sol's content and look up its cached evaluation: 0/1 arrays
+        by their packed bits (see solution_key), anything else by its bytes.
+        Returns (content hash or None if uncacheable, evaluation or None) """
+        if not self.cache_size or not hasattr(sol, 'tobytes'):
+            return None, None
+        if isinstance(sol, np.ndarray) and is_binary(sol):
+            content = hash(solution_key(sol))
+        else:
+            content = hash(sol.tobytes())
+        eval = self.cache.get(content)
+        if eval is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+            self.cache.move_to_end(content)
+        return content, eval
 
+    def _remember(self, content, eval):
+        """ Cache an evaluation, evicting the least recently used """
+        if content is None:
+            return
+        self.cache[content] = eval
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def cache_stats(self):
+        """ Evaluation cache counters """
+        return {'hits': self.cache_hits, 'misses': self.cache_misses,
+                'duplicates': self.duplicates, 'size': len(self.cache)}
+
+    def _score(self, sol):
+        """ Evaluate sol wrt each registered objective, timing each one """
         # Create the evaluation key
         # key:  ( (objname1, objvalue1), (objname2, objvalue2), ...... )
-        eval = tuple([(name, f(sol)) for name, f in self.fitness.items()])
+        eval = []
+        self.evaluations += 1
+        for name, f in self.fitness.items():
+            started = perf_counter_ns()
+            eval.append((name, f(sol)))
+            self._count('objective', name, perf_counter_ns() - started)
+        return tuple(eval)
 
-        # Add to the dictionary
+    def _count(self, kind, name, ns, calls=1):
+        """ Add timed calls (one by default) to the (kind, name) counter """
+        counter = self.counters.get((kind, name))
+        if counter is None:
+            self.counters[(kind, name)] = [calls, ns]
+        else:
+            counter[0] += calls
+            counter[1] += ns
+
+    def timings(self):
+        """ The hot-path counters as a DataFrame, slowest total first:
+        one row per agent, objective, delta scoring and remove_dominated """
+        rows = [{'kind': kind, 'name': name, 'calls': calls, 'total_ms': ns / 1e6,
+                 'us_per_call': ns / calls / 1e3}
+                for (kind, name), (calls, ns) in self.counters.items()]
+        if not rows:
+            return pd.DataFrame(columns=['kind', 'name', 'calls', 'total_ms', 'us_per_call'])
+        return pd.DataFrame(rows).sort_values('total_ms', ascending=False, ignore_index=True)
+
+    def _delta_evaluate(self, parent, move):
+        """ Score a move away from the parent solution using the deltas.
+        Returns the new evaluation key and the new cached state.
+        A parent without a cached state (e.g. merged in) gets one first """
+        started = perf_counter_ns()
+        self.evaluations += 1
+        if parent not in self.states:
+            self.states[parent] = self.make_state(self.pop[parent])
+        state = self.states[parent].copy()
+        scores = [score for _, score in parent]
+        deltas = [self.deltas[name] for name, _ in parent]
+        for cell in move:
+            scores = [delta(score, state, cell) for delta, score in zip(deltas, scores)]
+            state.apply(cell)
+        eval = tuple(zip([name for name, _ in parent], scores))
+        # The deltas interleave per cell, so they are timed as one
+        self._count('delta', 'all objectives', perf_counter_ns() - started)
+        return eval, state
+
+    def _insert(self, eval, sol, state=None):
+        """ Store a scored solution (and its cached state, if any).
+        Returns eval, or None if the solution was rejected (archive or
+        scalar mode) """
+        if self.archive:
+            started = perf_counter_ns()
+            if self.front is None:
+                self.front = pareto.Archive.from_scores(*self.scores())
+            accepted, evicted = self.front.insert(eval, [score for _, score in eval])
+            self._count('archive', 'insert', perf_counter_ns() - started)
+            if not accepted:
+                return None
+            for key in evicted:
+                del self.pop[key]
+                self.states.pop(key, None)
+        elif self.scalar and eval not in self.pop:
+            started = perf_counter_ns()
+            if self.ranking is None:
+                self._rank_population()
+            rank = self._negated_rank(eval)
+            entry = (rank, next(self.tiebreak), eval)
+            if len(self.ranking) < self.elite:
+                heapq.heappush(self.ranking, entry)
+            elif rank > self.ranking[0][0]:  # better than the worst of the elite
+                worst = heapq.heapreplace(self.ranking, entry)[2]
+                del self.pop[worst]
+                self.states.pop(worst, None)
+            else:
+                self._count('elite', 'insert', perf_counter_ns() - started)
+                return None
+            self._count('elite', 'insert', perf_counter_ns() - started)
         self.pop[eval] = sol
+        if state is not None:
+            self.states[eval] = state
+        else:
+            self.states.pop(eval, None)
+        return eval
 
+    def merge(self, items, nondominated=False):
+        """ Add already-scored (evaluation, solution) pairs, e.g. solutions
+        migrating in from another population, without rescoring them.
+        Their cached states are only built once they are picked as parents.
+        The archive front or the elite is rebuilt once, after all are added.
+        nondominated = True if the items are known to be mutually
+                       non-dominated (e.g. a saved archive): merged into an
+                       empty archive, they skip the O(n^2) dominance pass """
+        fresh = not self.pop
+        for eval, sol in items:
+            self.pop[eval] = sol
+            self.states.pop(eval, None)
+        if self.archive:
+            started = perf_counter_ns()
+            build = pareto.Archive.from_front if fresh and nondominated else pareto.Archive.from_scores
+            self.front = build(*self.scores())
+            for key in set(self.pop) - self.front.members:
+                del self.pop[key]
+                self.states.pop(key, None)
+            self._count('archive', 'merge', perf_counter_ns() - started)
+        elif self.scalar:
+            self._rank_population()
 
-    def run_agent(self, name):
-        """ Invoking a named agent against the current population """
+    def save_checkpoint(self, path):
+        """ Save the population to an .npz file: objective names, the score
+        matrix and the stacked solutions (bit-packed when they are 0/1), or
+        for sparse solutions (see sparse.py) their concatenated cells and
+        where each one starts. The file is replaced atomically, so a crash
+        mid-save leaves the previous checkpoint intact. Solutions must be
+        same-shape arrays or same-shape sparse solutions """
+        keys, scores = self.scores()
+        names = [name for name, _ in keys[0]] if keys else list(self.fitness)
+        arrays = {
+            'names': np.array(names, dtype=str),
+            'scores': np.array([[score for _, score in k] for k in keys]).reshape(len(keys), len(names)),
+            'front': np.array(bool(self.archive)),  # non-dominated by construction
+        }
+        solutions = [self.pop[k] for k in keys]
+        if solutions and hasattr(solutions[0], 'cells'):
+            arrays['shape'] = np.array(solutions[0].shape)
+            arrays['cells'] = np.concatenate([sol.cells for sol in solutions])
+            arrays['offsets'] = np.cumsum([0] + [len(sol.cells) for sol in solutions])
+        else:
+            solutions = np.stack(solutions) if keys else np.zeros((0,))
+            binary = bool(is_binary(solutions))
+            arrays['shape'] = np.array(solutions.shape)
+            arrays['dtype'] = np.array(str(solutions.dtype))
+            arrays['solutions'] = pack_solution(solutions) if binary else solutions
+            arrays['binary'] = np.array(binary)
+        temp = f"{path}.tmp"
+        with open(temp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp, path)
+
+    def load_checkpoint(self, path):
+        """ Add the population saved by save_checkpoint without rescoring
+        it. The saved objectives must match the registered ones (if any).
+        Returns the # of solutions loaded """
+        with np.load(path) as data:
+            names = data['names'].tolist()
+            if self.fitness and names != list(self.fitness):
+                raise ValueError(f"Checkpoint objectives {names} do not match "
+                                 f"registered objectives {list(self.fitness)}")
+            shape = tuple(data['shape'])
+            if 'cells' in data.files:
+                from sparse import SparseSolution
+                cells, offsets = data['cells'], data['offsets']
+                solutions = [SparseSolution(shape, cells[start:stop])
+                             for start, stop in zip(offsets[:-1], offsets[1:])]
+            else:
+                solutions = data['solutions']
+                if data['binary']:
+                    solutions = unpack_solution(solutions, shape[-1])
+                solutions = solutions.astype(str(data['dtype']))
+            scores = data['scores'].tolist()
+            front = 'front' in data.files and bool(data['front'])
+        self.merge(((tuple(zip(names, row)), sol) for row, sol in zip(scores, solutions)),
+                   nondominated=front)
+        return len(scores)
+
+    def evaluate_batch(self, batch):
+        """ Evaluate a batch of solutions wrt each registered objective.
+        Batch-capable objectives score the whole stack in one call; the
+        others fall back to one call per solution.
+        Returns one evaluation key per solution (see add_solution) """
+        stack = np.asarray(batch) if self.batched else None
+        self.evaluations += len(batch)
+        columns = []
+        for name, f in self.fitness.items():
+            started = perf_counter_ns()
+            if name in self.batched:
+                scores = np.asarray(f(stack)).tolist()
+            else:
+                scores = [f(sol) for sol in batch]
+            # Counted per solution, like _score, so us_per_call stays comparable
+            self._count('objective', name, perf_counter_ns() - started, len(batch))
+            columns.append([(name, score) for score in scores])
+        return list(zip(*columns))
+
+    def add_solutions(self, batch):
+        """ Adds a batch of solutions to the current population,
+        scoring them together with evaluate_batch.
+        Returns one evaluation key (or None if not added) per solution """
+        added = [None] * len(batch)
+        fresh, contents, positions = [], [], []
+        for i, sol in enumerate(batch):
+            content, eval = self._lookup(sol)
+            if eval is None:
+                fresh.append(sol)
+                contents.append(content)
+                positions.append(i)
+            elif eval in self.pop:
+                self.duplicates += 1
+            else:
+                added[i] = self._insert(eval, sol, self.make_state(sol) if self.make_state else None)
+        if len(fresh) == 0:
+            return added
+        for i, content, eval, sol in zip(positions, contents, self.evaluate_batch(fresh), fresh):
+            self._remember(content, eval)
+            added[i] = self._insert(eval, sol, self.make_state(sol) if self.make_state else None)
+        return added
+
+
+    def _call_agent(self, name):
+        """ Invoke a named agent on k random picks.
+        Agents return either a new solution or a (solution, move) pair,
+        where move lists the (ta, section, value) cells changed from the
+        first pick. Returns (solution, parent key, move or None) """
         op, k = self.agents[name]
-        picks = self.get_random_solutions(k)
-        new_solution = op(picks)
-        self.add_solution(new_solution)
+        parents = self.get_random_keys(k)
+        picks = [Evo._copy(self.pop[key]) for key in parents]
+        started = perf_counter_ns()
+        result = op(picks)
+        self._count('agent', name, perf_counter_ns() - started)
+        if isinstance(result, tuple):
+            sol, move = result
+            return sol, (parents[0] if parents else None), move
+        return result, None, None
+
+    def make_offspring(self, name):
+        """ Invoke a named agent and return its new solution (unscored) """
+        return self._call_agent(name)[0]
+
+    def run_agent(self, name):
+        """ Invoking a named agent against the current population.
+        Returns the new solution's evaluation key (None if not added) """
+        sol, parent, move = self._call_agent(name)
+        return self.add_solution(sol, parent=parent, move=move)
+
 
+    def scores(self):
+        """ The population's evaluation keys and their scores as an
+        (n, num_objectives) NumPy matrix (rows in the same order) """
+        keys = list(self.pop.keys())
+        scores = np.array([[score for _, score in k] for k in keys], dtype=float)
+        width = len(keys[0]) if keys else len(self.fitness)
+        return keys, scores.reshape(len(keys), width)
+
+    @property
+    def scalar(self):
+        """ True in scalar (weighted or lexicographic) mode """
+        return self.weights is not None or self.lexicographic is not None
+
+    def _rank_vector(self):
+        """ The weight per objective, or the objective indices in priority
+        order (lexicographic mode); equal weights if neither is set """
+        names = list(self.fitness)
+        if self.lexicographic is not None:
+            return np.array([names.index(name) for name in self.lexicographic])
+        weights = self.weights if self.weights is not None else dict.fromkeys(names, 1.0)
+        if isinstance(weights, dict):
+            weights = [weights.get(name, 0.0) for name in names]
+        return np.asarray(weights, dtype=float)
+
+    def scalarize(self, scores):
+        """ Rank keys of an (n, num_objectives) score matrix as an (n, k)
+        matrix whose rows compare lexicographically (lower is better): the
+        weighted sum (k = 1), or the scores in priority order """
+        scores = np.asarray(scores, dtype=float)
+        vector = self._rank_vector()
+        if self.lexicographic is not None:
+            return scores[:, vector]
+        return scores @ vector[:, None]
+
+    def _negated_rank(self, eval):
+        """ Negated rank key of one evaluation, for the max-heap of the elite
+        (plain Python: per solution it beats a 1-row scalarize) """
+        if self.lexicographic is not None:
+            return tuple(-eval[i][1] for i in self.rank_vector)
+        return (-sum(w * score for w, (_, score) in zip(self.rank_vector, eval)),)
+
+    def _ranked(self):
+        """ The population's keys, best first, and their rank keys """
+        keys, scores = self.scores()
+        ranks = self.scalarize(scores)
+        order = np.lexsort(ranks.T[::-1]) if keys else []
+        return [keys[i] for i in order], ranks[order]
+
+    def _rank_population(self):
+        """ (Re)build the scalar mode's elite heap from the population,
+        keeping only its elite best-ranked solutions """
+        self.rank_vector = self._rank_vector().tolist()
+        keys, ranks = self._ranked()
+        for key in keys[self.elite:]:
+            del self.pop[key]
+            self.states.pop(key, None)
+        self.ranking = [(tuple(rank), next(self.tiebreak), key)
+                        for key, rank in zip(keys[:self.elite], (-ranks).tolist())]
+        heapq.heapify(self.ranking)
+
+    def best(self):
+        """ The best-ranked (evaluation, solution) of the population by the
+        weighted or lexicographic ranking (equal weights if neither is
+        set), or None if the population is empty """
+        keys, _ = self._ranked()
+        return (keys[0], self.pop[keys[0]]) if keys else None
 
     @staticmethod
     def _dominates(p, q):
@@ -74,61 +544,233 @@ class Evo:
         """ Remove solutions from the pop that are dominated (worse) compared
         to other existing solutions. This is what provides selective pressure
         driving the population towards the pareto optimal tradeoff curve. """
-        nds = reduce(Evo._reduce_nds, self.pop.keys(), self.pop.keys())
+        started = perf_counter_ns()
+        if self.nds == 'reduce':
+            nds = reduce(Evo._reduce_nds, self.pop.keys(), self.pop.keys())
+        else:
+            keys, scores = self.scores()
+            nds = [k for k, keep in zip(keys, pareto.nondominated(scores, self.nds)) if keep]
         self.pop = {k:self.pop[k] for k in nds}
+        self.states = {k:self.states[k] for k in nds if k in self.states}
+        if self.archive:
+            self.front = pareto.Archive.from_scores(*self.scores())
+        self.ranking = None
+        self._count('remove_dominated', self.nds, perf_counter_ns() - started)
 
     
 
-    def evolve(self, time_limit=300, dom=100, status=1000):
-        """ Run the framework (start evolving solutions)
-        time_limit = time limit in seconds (default 5 minutes)
-        dom = how often to remove dominated solutions
-        status = how often to print status updates """
-        
+    def front_metrics(self, reference=None, reference_front=None):
+        """ Quality of the current population as a front: size,
+        hypervolume (given a reference point), spacing, spread and IGD
+        (given a reference front); see metrics.front_metrics """
+        return metrics.front_metrics(self.scores()[1], reference, reference_front)
+
+    def status(self, iteration, elapsed, reference=None, final=False, reference_front=None):
+        """ A compact, JSON-serializable summary of the run so far:
+        iteration rate, front size, best score per objective, the front's
+        spacing and spread (in periodic reports only up to NEIGHBOURS_MAX
+        solutions, None above; always in the final one), and its
+        hypervolume (given a reference point) and IGD (given a reference
+        front) """
+        keys, scores = self.scores()
+        names = [name for name, _ in keys[0]] if keys else list(self.fitness)
+        best = scores.min(axis=0) if len(scores) else [float('nan')] * len(names)
+        quality = dict.fromkeys(('hypervolume', 'spacing', 'spread', 'igd'))
+        if len(scores):
+            quality = metrics.front_metrics(scores, reference, reference_front,
+                                            neighbours_max=None if final else NEIGHBOURS_MAX)
+        return {
+            'elapsed': round(elapsed, 3),
+            'iteration': iteration,
+            'rate': iteration / elapsed if elapsed > 0 else 0.0,
+            'front': len(keys),
+            'best': {name: float(score) for name, score in zip(names, best)},
+            'hypervolume': quality['hypervolume'],
+            'spacing': quality['spacing'],
+            'spread': quality['spread'],
+            'igd': quality['igd'],
+            'evaluations': self.evaluations,
+            'cache': self.cache_stats(),
+            'final': final,
+            'stopped': self.stop_reason if final else None,
+        }
+
+    def _reached(self, target):
+        """ True if some population member is no worse than the target
+        on every objective (target: name --> score, or scores in order) """
+        keys, scores = self.scores()
+        if not keys:
+            return False
+        if isinstance(target, dict):
+            target = [target[name] for name, _ in keys[0]]
+        return bool(np.all(scores <= np.asarray(target, dtype=float), axis=1).any())
+
+    def evolve(self, time_limit=300, dom=100, status=1000, batch=1, reporters=None,
+               reference=None, scheduler=None, max_iter=None, max_evals=None,
+               stagnation=None, target=None, checkpoint=None, checkpoint_every=60,
+               reference_front=None):
+        """ Run the framework (start evolving solutions) until the first
+        stopping criterion is met (see stop_reason)
+        time_limit = time limit in seconds (default 5 minutes; None for none)
+        dom = how often to remove dominated solutions (ignored in archive
+              and scalar modes)
+        status = how often to report progress
+        batch = # of offspring to collect and score together (1 = score each
+                offspring as soon as it is made)
+        reporters = progress sinks (see telemetry.py); default is one
+                    compact status line per report, [] for a silent run
+        reference = hypervolume reference point for the reports (default:
+                    twice the worst scores at the first report, plus one)
+        scheduler = picks the agent to run each iteration (see scheduler.py);
+                    default is uniform over the agents without a period
+                    (pass those as its fixed agents; ValueError if it can
+                    pick one). Per-agent stats: agent_stats()
+        max_iter = stop after this many iterations (agent calls)
+        max_evals = stop after this many solutions have been scored
+        stagnation = stop when the front has not changed (no new
+                     non-dominated score vector, hence no hypervolume gain)
+                     for this many iterations; checked every dom iterations
+        target = stop once some solution is no worse than this objective
+                 vector (name --> score, or scores in objective order);
+                 checked every dom iterations
+        checkpoint = path to autosave the population to (see save_checkpoint)
+                     every checkpoint_every seconds and at the end
+        reference_front = known good front (score matrix) to report the IGD
+                          against, for convergence tracking """
+
+        if time_limit is None and max_iter is None and max_evals is None \
+                and stagnation is None and target is None:
+            raise ValueError("evolve needs at least one stopping criterion")
+        if reporters is None:
+            reporters = [telemetry.StatusLine()]
+        scheduled = sorted(set(scheduler.names) & set(self.periodic)) if scheduler else []
+        if scheduled:
+            raise ValueError(f"Agents {scheduled} run on a fixed period: pass them to "
+                             f"the scheduler as fixed agents, not as names to pick")
+        self.scheduler = scheduler or UniformScheduler(
+            [name for name in self.agents if name not in self.periodic], fixed=self.periodic)
         start_time = time.time()
-        agent_names = list(self.agents.keys())
         iteration = 0
-        
-        while time.time() - start_time < time_limit:
-            pick = rnd.choice(agent_names)  # pick an agent to run
-            self.run_agent(pick)
-            
-            if iteration % dom == 0:
+        offspring, parents = [], []  # batch mode: offspring awaiting scoring
+        pending = {}  # evaluation --> agent, awaiting the next prune (non-archive)
+        evals_at_start = self.evaluations
+        front, last_change = None, 0  # front's keys at the last check, and when it changed
+        last_save = start_time
+        self.stop_reason = None
+
+        def credit(name, eval):
+            """ Reward an agent whose offspring made the front """
+            if eval is None:
+                self.scheduler.reward(name, False)
+            elif self.archive or self.scalar:
+                self.scheduler.reward(name, True)  # only front / elite members are admitted
+            else:
+                pending[eval] = name
+
+        def flush():
+            """ Score any batched offspring, then prune and judge pending offspring """
+            nonlocal offspring, parents
+            for name, eval in zip(parents, self.add_solutions(offspring)):
+                credit(name, eval)
+            offspring, parents = [], []
+            if not (self.archive or self.scalar):
                 self.remove_dominated()
-            
-            if iteration % status == 0:
+                for eval, name in pending.items():
+                    self.scheduler.reward(name, eval in self.pop)
+                pending.clear()
+
+        while True:
+            if time_limit is not None and time.time() - start_time >= time_limit:
+                self.stop_reason = 'time_limit'
+            elif max_iter is not None and iteration >= max_iter:
+                self.stop_reason = 'max_iter'
+            elif max_evals is not None and self.evaluations - evals_at_start >= max_evals:
+                self.stop_reason = 'max_evals'
+            if self.stop_reason:
+                break
+
+            pick = self.scheduler.pick()  # pick an agent to run
+            started = time.perf_counter()
+            if batch > 1:
+                offspring.append(self.make_offspring(pick))
+                parents.append(pick)
+                self.scheduler.charge(pick, time.perf_counter() - started)
+                if len(offspring) >= batch:
+                    for name, eval in zip(parents, self.add_solutions(offspring)):
+                        credit(name, eval)
+                    offspring, parents = [], []
+            else:
+                eval = self.run_agent(pick)
+                self.scheduler.charge(pick, time.perf_counter() - started)
+                credit(pick, eval)
+
+            for name, every in self.periodic.items():
+                if iteration and iteration % every == 0:
+                    started = time.perf_counter()
+                    eval = self.run_agent(name)
+                    self.scheduler.charge(name, time.perf_counter() - started)
+                    credit(name, eval)
+
+            # The archive keeps the population non-dominated as it goes
+            if iteration % dom == 0 or iteration % status == 0:
+                flush()
+
+            # Convergence checks, on the freshly pruned front
+            if iteration % dom == 0 and (stagnation is not None or target is not None):
+                current = set(self.pop)
+                if current != front:
+                    front, last_change = current, iteration
+                elif stagnation is not None and iteration - last_change >= stagnation:
+                    self.stop_reason = 'stagnation'
+                if target is not None and self._reached(target):
+                    self.stop_reason = 'target'
+
+            if checkpoint and iteration % dom == 0 and time.time() - last_save >= checkpoint_every:
+                self.save_checkpoint(checkpoint)
+                last_save = time.time()
+
+            if iteration % status == 0 and reporters:
                 elapsed = time.time() - start_time
-                self.remove_dominated()
-                print(f"Time elapsed: {elapsed:.1f}s")
-                print(f"Iteration: {iteration}")
-                print(f"Population size: {len(self.pop)}")
-                print(self)
-            
+                if reference is None and self.pop:
+                    reference = metrics.reference_point(self.scores()[1], scale=2.0)
+                stats = self.status(iteration, elapsed, reference,
+                                    reference_front=reference_front)
+                for reporter in reporters:
+                    reporter.report(self, stats)
+
             iteration += 1
-        
-        self.remove_dominated()
-        total_time = time.time() - start_time
-        print(f"\nEvolution completed in {total_time:.1f} seconds")
-        print(f"Total iterations: {iteration}")
-        print(f"Final population size: {len(self.pop)}")
+            if self.stop_reason:
+                break
+
+        flush()
+        if checkpoint:
+            self.save_checkpoint(checkpoint)
+        if reporters:
+            total_time = time.time() - start_time
+            stats = self.status(iteration, total_time, reference, final=True,
+                                reference_front=reference_front)
+            for reporter in reporters:
+                reporter.report(self, stats)
+        return self.stop_reason
+
+    def agent_stats(self):
+        """ Per-agent calls, CPU time and acceptance into the front
+        from the last evolve run, as a DataFrame """
+        if self.scheduler is None:
+            return pd.DataFrame()
+        return self.scheduler.stats()
 
     def summarize(self):
         """Convert the population to a summary table format"""
         if not self.pop:
             return pd.DataFrame()
-        
-        # Extract objective names from the first solution's evaluation
-        obj_names = [name for name, _ in list(self.pop.keys())[0]]
-        
-        # Create rows for each solution
-        rows = []
-        for eval_key, solution in self.pop.items():
-            row = {name: score for (name, score) in eval_key}
-            rows.append(row)
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(rows)
-        return df
+
+        # One row of scores per solution, straight from the evaluation keys
+        # (see export.py to stream solutions and scores to a file)
+        keys = list(self.pop.keys())
+        obj_names = [name for name, _ in keys[0]]
+        return pd.DataFrame([[score for _, score in key] for key in keys],
+                            columns=obj_names)
 
     def __str__(self):
         """ Output the solutions in the population """
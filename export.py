@@ -0,0 +1,102 @@
+"""
+File: export.py
+Description: Streaming export of an Evo population: each solution's
+            objective scores and its sparse assignment list (the ta and
+            section indices of every assigned cell), written chunk by
+            chunk to CSV, JSON lines or Parquet so that large fronts never
+            have to be held in memory as one table.
+"""
+
+import csv
+import json
+import numpy as np
+
+try:  # Parquet export is optional
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+def iter_chunks(evo, chunk=1000):
+    """ Yield the population as column chunks of up to `chunk` solutions:
+    dicts of 'id', one list per objective, and 'tas' / 'sections' (one
+    index array per solution; solution[tas[j], sections[j]] == 1) """
+    keys = list(evo.pop.keys())
+    names = [name for name, _ in keys[0]] if keys else list(evo.fitness)
+    for start in range(0, len(keys), chunk):
+        block = keys[start:start + chunk]
+        columns = {'id': list(range(start, start + len(block)))}
+        for j, name in enumerate(names):
+            columns[name] = [key[j][1] for key in block]
+        cells = [np.nonzero(sol == 1) if isinstance(sol, np.ndarray) else sol.nonzero()
+                 for sol in (evo.pop[key] for key in block)]
+        columns['tas'] = [tas for tas, _ in cells]
+        columns['sections'] = [sections for _, sections in cells]
+        yield columns
+
+
+def _rows(columns):
+    """ The rows of a column chunk, as plain Python values """
+    names = list(columns)
+    for values in zip(*columns.values()):
+        yield {name: (value.tolist() if isinstance(value, np.ndarray) else
+                      value.item() if isinstance(value, np.generic) else value)
+               for name, value in zip(names, values)}
+
+
+def _write_csv(chunks, path):
+    """ One row per solution; tas and sections as space-separated indices """
+    with open(path, 'w', newline='') as f:
+        writer = None
+        for columns in chunks:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(columns))
+                writer.writeheader()
+            for row in _rows(columns):
+                row['tas'] = ' '.join(map(str, row['tas']))
+                row['sections'] = ' '.join(map(str, row['sections']))
+                writer.writerow(row)
+
+
+def _write_jsonl(chunks, path):
+    """ One JSON object per solution """
+    with open(path, 'w') as f:
+        for columns in chunks:
+            f.writelines(json.dumps(row) + "\n" for row in _rows(columns))
+
+
+def _write_parquet(chunks, path):
+    """ One row group per chunk; tas and sections as list<int32> columns """
+    if pa is None:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+    writer = None
+    try:
+        for columns in chunks:
+            arrays = {name: (pa.array([a.astype(np.int32) for a in values],
+                                      type=pa.list_(pa.int32()))
+                             if name in ('tas', 'sections') else pa.array(values))
+                      for name, values in columns.items()}
+            table = pa.table(arrays)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_population(evo, path, format=None, chunk=1000):
+    """ Write every solution in evo's population to path.
+    format = 'csv', 'jsonl' or 'parquet' (default: from the file extension)
+    chunk = # of solutions converted and written at a time
+    Returns the # of solutions written """
+    if format is None:
+        format = path.rsplit('.', 1)[-1].lower()
+    writers = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+    if format not in writers:
+        raise ValueError(f"Unknown export format: {format!r} (use one of {FORMATS})")
+    writers[format](iter_chunks(evo, chunk), path)
+    return len(evo.pop)
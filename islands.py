@@ -0,0 +1,81 @@
+"""
+File: islands.py
+Description: Island-model runner that evolves several Evo populations in
+            parallel worker processes, migrating non-dominated solutions
+            between them and merging their fronts at the end.
+"""
+
+import random as rnd
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import assignta
+
+
+def _run_epoch(setup, seed, items, time_limit, seeds=None, population=50):
+    """ Worker: rebuild an island from its (evaluation, solution) pairs
+    (or, on the first epoch, from `population` fresh seeds), evolve it for
+    time_limit seconds and return its front """
+    rnd.seed(seed)
+    np.random.seed(seed % 2**32)
+    evo = setup()
+    if items:
+        evo.merge(items)
+    elif seeds is not None:
+        evo.add_solutions(seeds(population))
+    evo.evolve(time_limit=time_limit, reporters=[])
+    return list(evo.pop.items())
+
+
+def _migrate(fronts, migrants, rng):
+    """ Ring migration: island i receives up to `migrants` random front
+    members from island i - 1 """
+    moved = []
+    for i in range(len(fronts)):
+        source = fronts[i - 1]
+        moved.append(rng.sample(source, min(migrants, len(source))))
+    return [front + incoming for front, incoming in zip(fronts, moved)]
+
+
+def run_islands(setup, islands=4, time_limit=300, migrate_every=30,
+                migrants=5, seed=0, workers=None,
+                seeds=assignta.initial_population, population=50):
+    """ Evolve `islands` populations in parallel and return the merged front.
+    setup = picklable zero-argument function returning a configured Evo
+            (e.g. profiler.setup_optimizer)
+    time_limit = total wall-clock budget in seconds
+    migrate_every = seconds each island evolves between migrations
+    migrants = # of front members sent to the neighbouring island
+    seed = base seed; each island and epoch gets its own derived seed
+    workers = # of worker processes (default: one per island)
+    seeds = picklable f(n) giving n starting solutions for each island,
+            drawn with the island's own seed (e.g. sparse.initial_population
+            for a sparse setup; None to start from an empty population)
+    population = # of starting solutions per island """
+    rng = rnd.Random(seed)
+    epochs = max(1, round(time_limit / migrate_every))
+    epoch_time = time_limit / epochs
+    fronts = [[] for _ in range(islands)]
+
+    with ProcessPoolExecutor(max_workers=workers or islands) as pool:
+        for epoch in range(epochs):
+            futures = [pool.submit(_run_epoch, setup, seed + 1000 * i + epoch,
+                                   front, epoch_time, seeds, population)
+                       for i, front in enumerate(fronts)]
+            fronts = [future.result() for future in futures]
+            if epoch < epochs - 1:
+                fronts = _migrate(fronts, migrants, rng)
+
+    # Merge the islands' fronts into one population
+    evo = setup()
+    for front in fronts:
+        evo.merge(front)
+    evo.remove_dominated()
+    return evo
+
+
+if __name__ == '__main__':
+    import os
+    from profiler import setup_optimizer
+    result = run_islands(setup_optimizer, islands=os.cpu_count() or 1)
+    print(f"Merged front size: {len(result.pop)}")
+    result.summarize().to_csv('islands_summary.csv', index=False)
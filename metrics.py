@@ -0,0 +1,167 @@
+"""
+File: metrics.py
+Description: Front-quality metrics for minimization fronts, computed
+            from the score matrix of a population (see Evo.scores) or
+            straight from Evo.pop evaluation keys (see front_metrics):
+            hypervolume (exact, or a Monte-Carlo estimate for large
+            fronts), spacing, spread and IGD against a reference front.
+"""
+
+import numpy as np
+import pareto
+
+
+def reference_point(scores, margin=1.0, scale=1.0):
+    """ A reference point beyond the worst score on each objective:
+    scale * worst + margin """
+    return scale * np.asarray(scores, dtype=float).max(axis=0) + margin
+
+
+def _hv2d(points, ref):
+    """ Exact 2-D hypervolume by a sweep over the first objective """
+    points = points[np.argsort(points[:, 0])]
+    volume, best = 0.0, ref[1]
+    for x, y in points:
+        if y < best:
+            volume += (ref[0] - x) * (best - y)
+            best = y
+    return volume
+
+
+def _wfg(points, ref):
+    """ Exact hypervolume of a non-dominated point set (WFG algorithm):
+    the sum of each point's exclusive contribution, i.e. its box minus the
+    part already covered by the points after it. With points sorted by the
+    last objective (worst first) those limited points all share p's last
+    coordinate, so the covered part is computed one dimension down """
+    if len(points) == 0:
+        return 0.0
+    if len(points) == 1:
+        return float(np.prod(ref - points[0]))
+    if points.shape[1] == 2:
+        return _hv2d(points, ref)
+    points = points[np.argsort(-points[:, -1], kind='stable')]
+    volume = 0.0
+    for i, p in enumerate(points):
+        limited = np.maximum(points[i + 1:, :-1], p[:-1])
+        limited = limited[pareto.nondominated(limited)]
+        covered = _wfg(limited, ref[:-1])
+        volume += (ref[-1] - p[-1]) * (np.prod(ref[:-1] - p[:-1]) - covered)
+    return float(volume)
+
+
+def hypervolume(scores, ref):
+    """ Exact hypervolume dominated by the score rows (minimization),
+    bounded by the reference point ref. Rows not strictly better than
+    ref on every objective contribute nothing """
+    scores = np.asarray(scores, dtype=float)
+    ref = np.asarray(ref, dtype=float)
+    if len(scores) == 0:
+        return 0.0
+    scores = scores[np.all(scores < ref, axis=1)]
+    if len(scores) == 0:
+        return 0.0
+    scores = np.unique(scores[pareto.nondominated(scores)], axis=0)
+    return _wfg(scores, ref)
+
+
+def hypervolume_mc(scores, ref, samples=10000, seed=0):
+    """ Monte-Carlo estimate of the hypervolume: the fraction of uniform
+    samples in the box between the ideal point and ref that some row
+    dominates, times the box volume """
+    scores = np.asarray(scores, dtype=float)
+    ref = np.asarray(ref, dtype=float)
+    scores = scores[np.all(scores < ref, axis=1)] if len(scores) else scores
+    if len(scores) == 0:
+        return 0.0
+    ideal = scores.min(axis=0)
+    rng = np.random.default_rng(seed)
+    hits = 0
+    for start in range(0, samples, 1000):
+        points = rng.uniform(ideal, ref, size=(min(1000, samples - start), len(ref)))
+        covered = np.all(scores[None, :, :] <= points[:, None, :], axis=2).any(axis=1)
+        hits += int(covered.sum())
+    return float(np.prod(ref - ideal) * hits / samples)
+
+
+def estimate_hypervolume(scores, ref, exact_max=100, samples=2000):
+    """ Exact hypervolume for fronts of up to exact_max rows, a Monte-Carlo
+    estimate beyond that (cheap enough for periodic progress reports) """
+    if len(scores) <= exact_max:
+        return hypervolume(scores, ref)
+    return hypervolume_mc(scores, ref, samples=samples)
+
+
+def scores_of(keys):
+    """ Score matrix of evaluation keys ((name, score), ...) such as the
+    keys of Evo.pop """
+    keys = list(keys)
+    width = len(keys[0]) if keys else 0
+    return np.array([[score for _, score in k] for k in keys], dtype=float).reshape(len(keys), width)
+
+
+def _nearest(a, b, exclude_self=False, cells=2**21):
+    """ Distance from each row of a to its nearest row of b (Euclidean),
+    computed in chunks of a of about `cells` differences to bound memory """
+    nearest = np.empty(len(a))
+    chunk = max(1, cells // max(1, b.size))
+    for start in range(0, len(a), chunk):
+        block = a[start:start + chunk]
+        dist = np.sqrt(((block[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+        if exclude_self:
+            dist[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        nearest[start:start + chunk] = dist.min(axis=1)
+    return nearest
+
+
+def spacing(scores):
+    """ Schott's spacing: the standard deviation of each point's distance
+    to its nearest neighbour on the front (0 = evenly spaced) """
+    scores = np.unique(np.asarray(scores, dtype=float), axis=0)
+    if len(scores) < 2:
+        return 0.0
+    return float(np.std(_nearest(scores, scores, exclude_self=True), ddof=1))
+
+
+def spread(scores, reference_front=None):
+    """ Generalized spread (Zhou et al.): how evenly the front covers the
+    extremes of the reference front, from 0 (ideal) upwards. Without a
+    reference front only the uniformity of the neighbour distances counts """
+    scores = np.unique(np.asarray(scores, dtype=float), axis=0)
+    if len(scores) < 2:
+        return 0.0
+    d = _nearest(scores, scores, exclude_self=True)
+    extremes = 0.0
+    if reference_front is not None:
+        reference_front = np.asarray(reference_front, dtype=float)
+        ends = reference_front[np.argmin(reference_front, axis=0)]
+        extremes = float(_nearest(ends, scores).sum())
+    denominator = extremes + len(d) * d.mean()
+    return float((extremes + np.abs(d - d.mean()).sum()) / denominator) if denominator else 0.0
+
+
+def igd(scores, reference_front):
+    """ Inverted generational distance: the mean distance from each point of
+    the reference front to its nearest score row (lower is better) """
+    scores = np.asarray(scores, dtype=float)
+    reference_front = np.asarray(reference_front, dtype=float)
+    if len(scores) == 0:
+        return float('inf')
+    return float(_nearest(reference_front, scores).mean())
+
+
+def front_metrics(front, ref=None, reference_front=None, exact_max=100, neighbours_max=None):
+    """ Every metric of a front, given as Evo.pop keys or a score matrix:
+    size, hypervolume (needs ref; exact up to exact_max rows), spacing,
+    spread and IGD (needs reference_front).
+    neighbours_max = skip spacing and spread (None) above this many rows:
+                     their all-pairs neighbour search is O(n^2) """
+    scores = np.asarray(front, dtype=float) if isinstance(front, np.ndarray) else scores_of(front)
+    neighbours = neighbours_max is None or len(scores) <= neighbours_max
+    return {
+        'size': len(scores),
+        'hypervolume': estimate_hypervolume(scores, ref, exact_max) if ref is not None else None,
+        'spacing': spacing(scores) if neighbours else None,
+        'spread': spread(scores, reference_front) if neighbours else None,
+        'igd': igd(scores, reference_front) if reference_front is not None else None,
+    }
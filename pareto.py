@@ -0,0 +1,127 @@
+"""
+File: pareto.py
+Description: Fast non-dominated filtering of a matrix of objective scores.
+            Rows are solutions, columns are objectives, and every
+            objective is minimized.
+"""
+
+import numpy as np
+
+METHODS = ('auto', 'sort', 'pairwise')
+
+# Below this many rows the all-pairs test beats the sort-based loop
+PAIRWISE_MAX = 48
+
+
+def dominates(p, q):
+    """ True if score vector p dominates q (no worse anywhere, better somewhere) """
+    return bool(np.all(p <= q) and np.any(p < q))
+
+
+def dominated_by(front, p):
+    """ Boolean mask of the rows of front that dominate score vector p """
+    return np.all(front <= p, axis=1) & np.any(front < p, axis=1)
+
+
+def _nondominated_sort(scores):
+    """ Sort-based filter: after a lexicographic sort a row can only be
+    dominated by rows before it, so each row is checked against the front
+    found so far (O(n * front) comparisons). Rows are deduplicated first,
+    so an earlier front row that is no worse everywhere dominates """
+    unique, inverse = np.unique(scores, axis=0, return_inverse=True)
+    keep = np.zeros(len(unique), dtype=bool)
+    front = np.empty_like(unique)
+    size = 0
+    for i, p in enumerate(unique):
+        if size and (front[:size] <= p).all(axis=1).any():
+            continue
+        front[size] = p
+        size += 1
+        keep[i] = True
+    return keep[inverse.reshape(-1)]
+
+
+def _nondominated_pairwise(scores, chunk=256):
+    """ Vectorized all-pairs dominance test, chunked to bound memory """
+    n = len(scores)
+    mask = np.ones(n, dtype=bool)
+    for start in range(0, n, chunk):
+        block = scores[start:start + chunk, None, :]  # (chunk, 1, m)
+        no_worse = np.all(scores[None, :, :] <= block, axis=2)
+        better = np.any(scores[None, :, :] < block, axis=2)
+        mask[start:start + chunk] = ~np.any(no_worse & better, axis=1)
+    return mask
+
+
+def nondominated(scores, method='auto'):
+    """ Boolean mask of the non-dominated rows of an (n, m) score matrix.
+    method = 'sort' (sort-based, fastest for typical fronts),
+             'pairwise' (vectorized all-pairs comparison, fastest for a
+             few dozen rows) or 'auto' (pick by size) """
+    scores = np.asarray(scores, dtype=float)
+    if len(scores) == 0:
+        return np.zeros(0, dtype=bool)
+    if method == 'auto':
+        method = 'pairwise' if len(scores) < PAIRWISE_MAX else 'sort'
+    if method == 'sort':
+        return _nondominated_sort(scores)
+    if method == 'pairwise':
+        return _nondominated_pairwise(scores)
+    raise ValueError(f"Unknown non-dominated filtering method: {method!r}")
+
+
+class Archive:
+    """ A non-dominated set of score vectors with O(front) insertion.
+    Each score vector is stored under a hashable key (e.g. an Evo
+    evaluation key) """
+
+    def __init__(self, m):
+        self.keys = []
+        self.scores = np.empty((0, m))
+        self.members = set()
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_scores(cls, keys, scores):
+        """ Build an archive from the non-dominated rows of a score matrix """
+        scores = np.asarray(scores, dtype=float)
+        archive = cls(scores.shape[1])
+        mask = nondominated(scores)
+        archive.keys = [k for k, keep in zip(keys, mask) if keep]
+        archive.scores = scores[mask]
+        archive.members = set(archive.keys)
+        return archive
+
+    @classmethod
+    def from_front(cls, keys, scores):
+        """ Build an archive from rows already known to be mutually
+        non-dominated (e.g. a saved archive), with no dominance pass """
+        scores = np.asarray(scores, dtype=float)
+        archive = cls(scores.shape[1])
+        archive.keys = list(keys)
+        archive.scores = scores
+        archive.members = set(archive.keys)
+        return archive
+
+    def insert(self, key, p):
+        """ Offer score vector p under key.
+        Returns (accepted, evicted keys): p is rejected if a member dominates
+        it; otherwise it is added and the members it dominates are evicted """
+        if key in self.members:  # same scores: nothing to compare
+            return True, []
+        p = np.asarray(p, dtype=float)
+        if dominated_by(self.scores, p).any():
+            return False, []
+        evict = np.all(p <= self.scores, axis=1) & np.any(p < self.scores, axis=1)
+        evicted = []
+        if evict.any():
+            evicted = [k for k, out in zip(self.keys, evict) if out]
+            self.keys = [k for k, out in zip(self.keys, evict) if not out]
+            self.scores = self.scores[~evict]
+            self.members.difference_update(evicted)
+        self.keys.append(key)
+        self.scores = np.vstack([self.scores, p])
+        self.members.add(key)
+        return True, evicted
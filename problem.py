@@ -0,0 +1,215 @@
+"""
+File: problem.py
+Description: A precompiled numeric model of the TA assignment problem.
+            The TA and section tables are validated and parsed once into
+            small NumPy arrays that the objectives and agents work from
+            directly. Parsed arrays are cached in a .npz sidecar, and the
+            default problem is only loaded on first use (default_problem).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Where the shipped CSVs live; TA_SECTIONS_CSV / TA_TAS_CSV override them
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES = ('U', 'W', 'P')  # unavailable, willing (unpreferred), preferred
+CACHE_VERSION = 1
+
+
+def validate(sections_df, tas_df):
+    """ Check that the sections and TAs tables describe one problem.
+    Raises ValueError naming the first problem found """
+    for name, df, columns in (('sections', sections_df, ('daytime', 'min_ta', 'max_ta')),
+                              ('TAs', tas_df, ('name', 'max_assigned'))):
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"{name} table is missing columns {missing}")
+    num_codes = tas_df.shape[1] - 3
+    if num_codes != len(sections_df):
+        raise ValueError(f"TAs table has {num_codes} availability columns "
+                         f"for {len(sections_df)} sections")
+    codes = tas_df.iloc[:, 3:].to_numpy(dtype=str)
+    bad = sorted(set(np.unique(codes).tolist()) - set(CODES))
+    if bad:
+        raise ValueError(f"Unknown availability codes {bad} (expected {list(CODES)})")
+    min_ta, max_ta = sections_df['min_ta'].to_numpy(), sections_df['max_ta'].to_numpy()
+    if np.any(min_ta < 0) or np.any(min_ta > max_ta):
+        raise ValueError("Every section needs 0 <= min_ta <= max_ta")
+    if np.any(tas_df['max_assigned'].to_numpy() < 0):
+        raise ValueError("max_assigned must be non-negative")
+
+
+class ProblemModel:
+
+    def __init__(self, sections_df, tas_df):
+        """ Build the model from the sections and TAs tables """
+        validate(sections_df, tas_df)
+        # Availability codes: one row per TA, one column per section
+        codes = tas_df.iloc[:, 3:].to_numpy(dtype=str)
+        self._build(
+            unavailable=(codes == 'U'),
+            unpreferred=(codes == 'W'),
+            min_ta=sections_df['min_ta'].to_numpy(),
+            max_ta=sections_df['max_ta'].to_numpy(),
+            max_assigned=tas_df['max_assigned'].to_numpy(),
+            times=sections_df['daytime'].to_numpy(dtype=str),
+            ta_names=tas_df['name'].to_numpy(dtype=str),
+        )
+
+    @classmethod
+    def from_arrays(cls, **arrays):
+        """ Rebuild a model from the arrays saved by to_arrays """
+        model = cls.__new__(cls)
+        model._build(**arrays)
+        return model
+
+    def to_arrays(self):
+        """ The parsed inputs of the model, as plain NumPy arrays """
+        return {'unavailable': self.unavailable, 'unpreferred': self.unpreferred,
+                'min_ta': self.min_ta, 'max_ta': self.max_ta,
+                'max_assigned': self.max_assigned, 'times': self.times,
+                'ta_names': self.ta_names}
+
+    def _build(self, unavailable, unpreferred, min_ta, max_ta, max_assigned, times, ta_names):
+        """ Derive every array the objectives and agents use """
+        self.num_tas, self.num_sections = unavailable.shape
+        self.ta_names = np.asarray(ta_names)
+
+        # 0/1 indicator matrices (TAs x sections)
+        self.unavailable = np.asarray(unavailable).astype(np.int8)
+        self.unpreferred = np.asarray(unpreferred).astype(np.int8)
+        self.available = (1 - self.unavailable).astype(np.int8)
+
+        # Section requirements and per-TA capacity
+        self.min_ta = np.asarray(min_ta, dtype=np.int64)
+        self.max_ta = np.asarray(max_ta, dtype=np.int64)
+        self.max_assigned = np.asarray(max_assigned, dtype=np.int64)
+
+        # Time-slot grouping: slot_of[section] -> index into slots
+        self.times = np.asarray(times, dtype=str)
+        self.slots, self.slot_of = np.unique(self.times, return_inverse=True)
+        self.slot_sections = [np.flatnonzero(self.slot_of == i)
+                              for i in range(len(self.slots))]
+
+        # Sections sorted by time slot, and where each slot's run starts,
+        # for summing assignment columns per slot in one pass
+        self.slot_order = np.argsort(self.slot_of, kind='stable')
+        self.slot_starts = np.searchsorted(self.slot_of[self.slot_order],
+                                           np.arange(len(self.slots)))
+
+        # Candidate TAs (not unavailable) for each section
+        self.candidates = [np.flatnonzero(self.available[:, s])
+                           for s in range(self.num_sections)]
+
+    @classmethod
+    def from_csv(cls, sections_path='sections.csv', tas_path='tas.csv', cache=True):
+        """ Load the model from the sections and TAs CSV files.
+        cache = keep the parsed arrays in a .npz sidecar next to the TAs
+                file, reused while both files keep their size and mtime """
+        if not cache:
+            return cls._read_csv(sections_path, tas_path)
+        key = _file_key(sections_path, tas_path)
+        cache_path = _cache_path(sections_path, tas_path)
+        try:
+            with np.load(cache_path) as data:
+                if str(data['key']) == key:
+                    return cls.from_arrays(**{name: data[name] for name in data.files if name != 'key'})
+        except (OSError, KeyError, ValueError):
+            pass  # no usable cache: parse the CSVs
+        model = cls._read_csv(sections_path, tas_path)
+        try:
+            temp = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                np.savez(f, key=np.array(key), **model.to_arrays())
+            os.replace(temp, cache_path)
+        except OSError:
+            pass  # read-only data directory: run without the cache
+        return model
+
+    @classmethod
+    def _read_csv(cls, sections_path, tas_path):
+        sections_df = pd.read_csv(sections_path, encoding='utf-8-sig')
+        tas_df = pd.read_csv(tas_path, encoding='utf-8-sig')
+        return cls(sections_df, tas_df)
+
+    @classmethod
+    def synthetic(cls, num_tas, num_sections, seed=0):
+        """ A random problem shaped like the shipped data: about 2.4
+        sections per time slot, 2-3 TAs needed per section, mostly
+        single-lab TAs, and roughly 66% U / 21% W / 13% P codes """
+        rng = np.random.default_rng(seed)
+        num_slots = max(1, round(num_sections / 2.4))
+        min_ta = rng.integers(2, 4, size=num_sections)
+        sections_df = pd.DataFrame({
+            'section': np.arange(num_sections),
+            'daytime': [f'slot {i}' for i in rng.integers(0, num_slots, size=num_sections)],
+            'min_ta': min_ta,
+            'max_ta': min_ta + 1,
+        })
+        codes = rng.choice(np.array(['U', 'W', 'P']), size=(num_tas, num_sections),
+                           p=[0.66, 0.21, 0.13])
+        tas_df = pd.concat([
+            pd.DataFrame({
+                'ta_id': np.arange(num_tas),
+                'name': [f'TA {i}' for i in range(num_tas)],
+                'max_assigned': rng.choice([1, 2, 3], size=num_tas, p=[0.65, 0.32, 0.03]),
+            }),
+            pd.DataFrame(codes, columns=[str(s) for s in range(num_sections)]),
+        ], axis=1)
+        return cls(sections_df, tas_df)
+
+    def slot_counts(self, solution, dtype=np.int64):
+        """ Labs per TA per time slot: (..., tas, slots) for a (..., tas,
+        sections) solution or batch """
+        assigned = (np.asarray(solution) == 1).view(np.uint8)
+        return np.add.reduceat(assigned[..., self.slot_order], self.slot_starts,
+                               axis=-1, dtype=dtype)
+
+    @property
+    def shape(self):
+        """ Shape of an assignment matrix for this problem """
+        return self.num_tas, self.num_sections
+
+
+def _file_key(*paths):
+    """ Cache key of input files: their paths, sizes and modification times """
+    parts = [str(CACHE_VERSION)]
+    for path in paths:
+        stat = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return '|'.join(parts)
+
+
+def _cache_path(sections_path, tas_path):
+    """ Sidecar file holding the parsed arrays of a sections/TAs pair """
+    directory = os.path.dirname(os.path.abspath(tas_path))
+    stem = os.path.splitext(os.path.basename(sections_path))[0] + '+' + \
+        os.path.splitext(os.path.basename(tas_path))[0]
+    return os.path.join(directory, f".{stem}.problem.npz")
+
+
+_default = None  # the lazily loaded default problem
+
+
+def default_paths():
+    """ The (sections, TAs) CSV paths of the default problem """
+    return (os.environ.get('TA_SECTIONS_CSV', os.path.join(DATA_DIR, 'sections.csv')),
+            os.environ.get('TA_TAS_CSV', os.path.join(DATA_DIR, 'tas.csv')))
+
+
+def use_data(sections_path, tas_path):
+    """ Point the default problem at other CSV files. Also sets the
+    environment variables, so worker processes load the same files """
+    global _default
+    os.environ['TA_SECTIONS_CSV'] = os.path.abspath(sections_path)
+    os.environ['TA_TAS_CSV'] = os.path.abspath(tas_path)
+    _default = None
+
+
+def default_problem():
+    """ The default problem, loaded (through the cache) on first use """
+    global _default
+    if _default is None:
+        _default = ProblemModel.from_csv(*default_paths())
+    return _default
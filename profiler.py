@@ -2,50 +2,97 @@ import cProfile
 import pstats
 from pstats import SortKey
 import time
+from functools import partial
 from evo import Evo
+from export import export_population
+import sparse
 from assignta import (
     overallocation,
     conflicts,
     undersupport,
     unavailable,
     unpreferred,
+    overallocation_delta,
+    conflicts_delta,
+    undersupport_delta,
+    unavailable_delta,
+    unpreferred_delta,
+    Tally,
+    DELTAS,
     swap_ta_agent,
     add_remove_agent,
     optimize_section_agent,
-    fix_conflicts_agent
+    fix_conflicts_agent,
+    feasible_add_remove_agent,
+    feasible_replace_agent,
+    feasible_swap_agent,
+    section_crossover_agent,
+    ta_crossover_agent,
+    best_column_crossover_agent,
+    local_search_agent,
+    initial_population
 )
 
-def setup_optimizer():
-    """Set up the evolutionary optimizer with objectives and agents"""
+def _bind(f, model):
+    """ f with its problem model fixed (partials stay picklable) """
+    return f if model is None else partial(f, model=model)
+
+def setup_optimizer(model=None):
+    """Set up the evolutionary optimizer with objectives and agents
+    model = problem.ProblemModel to solve (default: the shipped CSVs)"""
     optimizer = Evo()
     
     # Add objectives
-    optimizer.add_objective('overallocation', overallocation)
-    optimizer.add_objective('conflicts', conflicts)
-    optimizer.add_objective('undersupport', undersupport)
-    optimizer.add_objective('unavailable', unavailable)
-    optimizer.add_objective('unpreferred', unpreferred)
+    optimizer.add_objective('overallocation', _bind(overallocation, model), batch=True, delta=overallocation_delta)
+    optimizer.add_objective('conflicts', _bind(conflicts, model), batch=True, delta=conflicts_delta)
+    optimizer.add_objective('undersupport', _bind(undersupport, model), batch=True, delta=undersupport_delta)
+    optimizer.add_objective('unavailable', _bind(unavailable, model), batch=True, delta=unavailable_delta)
+    optimizer.add_objective('unpreferred', _bind(unpreferred, model), batch=True, delta=unpreferred_delta)
+    optimizer.set_state(_bind(Tally.from_solution, model))
     
     # Add agents
-    optimizer.add_agent('swap_ta', swap_ta_agent)
-    optimizer.add_agent('add_remove', add_remove_agent)
-    optimizer.add_agent('optimize_section', optimize_section_agent)
-    optimizer.add_agent('fix_conflicts', fix_conflicts_agent)
+    optimizer.add_agent('swap_ta', _bind(swap_ta_agent, model))
+    optimizer.add_agent('add_remove', _bind(add_remove_agent, model))
+    optimizer.add_agent('optimize_section', _bind(optimize_section_agent, model))
+    optimizer.add_agent('fix_conflicts', _bind(fix_conflicts_agent, model))
+    optimizer.add_agent('feasible_add_remove', _bind(feasible_add_remove_agent, model))
+    optimizer.add_agent('feasible_replace', _bind(feasible_replace_agent, model))
+    optimizer.add_agent('feasible_swap', _bind(feasible_swap_agent, model))
+    optimizer.add_agent('section_crossover', _bind(section_crossover_agent, model), k=2)
+    optimizer.add_agent('ta_crossover', _bind(ta_crossover_agent, model), k=2)
+    optimizer.add_agent('best_column_crossover', _bind(best_column_crossover_agent, model), k=2)
+    optimizer.add_agent('local_search', _bind(local_search_agent, model), every=500)
     
     return optimizer
 
+def setup_sparse_optimizer(model=None):
+    """Set up the optimizer on the sparse solution backend (sparse.py),
+    for problems with thousands of TAs and sections. Seed it with
+    sparse.initial_population"""
+    optimizer = Evo()
+    for name, f in sparse.OBJECTIVES.items():
+        optimizer.add_objective(name, _bind(f, model), delta=DELTAS[name])
+    optimizer.set_state(_bind(sparse.make_tally, model))
+    for name in ('swap_ta', 'add_remove', 'optimize_section', 'fix_conflicts',
+                 'feasible_add_remove', 'feasible_replace'):
+        optimizer.add_agent(name, _bind(getattr(sparse, f'{name}_agent'), model))
+    for name in ('section_crossover', 'ta_crossover', 'best_column_crossover'):
+        optimizer.add_agent(name, _bind(getattr(sparse, f'{name}_agent'), model), k=2)
+    return optimizer
+
 def main():
     """Main function to run and profile the optimization"""
     # Create and set up optimizer
     optimizer = setup_optimizer()
+    optimizer.add_solutions(initial_population(50))
     
     # Profile the evolution
     profiler = cProfile.Profile()
     profiler.enable()
     
-    # Run evolution for 5 minutes
+    # Run evolution for up to 5 minutes, or until the front stops changing
     start_time = time.time()
-    optimizer.evolve(time_limit=300)  # 5 minutes
+    optimizer.evolve(time_limit=300, stagnation=50000)
     total_time = time.time() - start_time
     
     profiler.disable()
@@ -71,6 +118,7 @@ def main():
     # Save final solutions
     solutions = optimizer.summarize()
     solutions.to_csv('nikit_summary.csv', index=False)
+    export_population(optimizer, 'nikit_solutions.csv')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,140 @@
+"""
+File: scenarios.py
+Description: Batch runner for what-if scenarios (e.g. other max_assigned
+            caps or dropped sections). Each scenario is a (tas, sections,
+            config) triple; the scenarios are validated and parsed once in
+            the parent, solved concurrently in worker processes, and each
+            finished front is streamed back as soon as it completes, with
+            its throughput.
+"""
+
+import random as rnd
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from problem import ProblemModel, default_paths
+
+# Scenario config keys handled by the runner; any other key is passed on
+# to Evo.evolve (e.g. max_iter, stagnation, target)
+DEFAULTS = {'name': None, 'time_limit': 60, 'seed': 0, 'population': 50,
+            'backend': 'dense', 'archive': False}
+
+
+def with_max_assigned(tas, cap):
+    """ A copy of the TAs table with every max_assigned capped at cap
+    (or set per TA, given a mapping ta_id --> max_assigned) """
+    tas = tas.copy()
+    if isinstance(cap, dict):
+        tas['max_assigned'] = [cap.get(ta, m) for ta, m in zip(tas['ta_id'], tas['max_assigned'])]
+    else:
+        tas['max_assigned'] = np.minimum(tas['max_assigned'], cap)
+    return tas
+
+
+def drop_sections(tas, sections, dropped):
+    """ The (tas, sections) tables without the given section ids """
+    keep = ~sections['section'].isin(dropped)
+    columns = list(tas.columns[:3]) + [c for c, k in zip(tas.columns[3:], keep) if k]
+    return tas[columns], sections[keep].reset_index(drop=True)
+
+
+def _model(tas, sections):
+    """ A validated problem model from tables or CSV paths """
+    if isinstance(tas, str) and isinstance(sections, str):
+        return ProblemModel.from_csv(sections, tas)
+    if isinstance(tas, str):
+        tas = pd.read_csv(tas, encoding='utf-8-sig')
+    if isinstance(sections, str):
+        sections = pd.read_csv(sections, encoding='utf-8-sig')
+    return ProblemModel(sections, tas)
+
+
+def _solve(arrays, config):
+    """ Worker: rebuild the scenario's model from its parsed arrays, evolve
+    a seeded population and return the front with throughput figures """
+    import assignta
+    import profiler
+    import sparse
+    options = dict(config)
+    settings = {key: options.pop(key, default) for key, default in DEFAULTS.items()}
+    rnd.seed(settings['seed'])
+    np.random.seed(settings['seed'] % 2**32)
+
+    started = time.time()
+    model = ProblemModel.from_arrays(**arrays)
+    if settings['backend'] == 'sparse':
+        evo = profiler.setup_sparse_optimizer(model)
+        seeds = sparse.initial_population(settings['population'], model)
+    else:
+        evo = profiler.setup_optimizer(model)
+        seeds = assignta.initial_population(settings['population'], model)
+    evo.archive = settings['archive']
+    evo.add_solutions(seeds)
+    stopped = evo.evolve(time_limit=settings['time_limit'], reporters=[], **options)
+    elapsed = time.time() - started
+
+    iterations = sum(evo.scheduler.calls.values())
+    summary = evo.status(iterations, elapsed, final=True)
+    return {
+        'name': settings['name'],
+        'shape': list(model.shape),
+        'front': list(evo.pop.items()),
+        'best': summary['best'],
+        'front_size': summary['front'],
+        'stopped': stopped,
+        'elapsed': elapsed,
+        'iterations': iterations,
+        'evaluations': evo.evaluations,
+        'iterations_per_second': iterations / elapsed if elapsed else 0.0,
+        'evaluations_per_second': evo.evaluations / elapsed if elapsed else 0.0,
+    }
+
+
+def run_scenarios(scenarios, workers=None):
+    """ Solve scenarios concurrently and yield each result as it finishes.
+    scenarios = iterable of (tas, sections, config): tas and sections are
+                DataFrames or CSV paths (None for the default problem's),
+                config a dict with optional name, time_limit, seed,
+                population (# of seeds), backend ('dense' or 'sparse'),
+                archive, plus any Evo.evolve stopping options
+    workers = # of worker processes (default: one per CPU)
+    Every scenario is validated before any is run (ValueError on bad
+    input). Each result is a dict with the scenario's name, its front as
+    (evaluation, solution) pairs, the best score per objective, why it
+    stopped, and its iterations and evaluations per second """
+    jobs = []
+    for i, (tas, sections, config) in enumerate(scenarios):
+        config = dict(config or {})
+        config.setdefault('name', f'scenario {i}')
+        default_sections, default_tas = default_paths()
+        model = _model(tas if tas is not None else default_tas,
+                       sections if sections is not None else default_sections)
+        jobs.append((model.to_arrays(), config))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_solve, arrays, config) for arrays, config in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def throughput(results):
+    """ Per-scenario throughput and outcome of run_scenarios results, as a DataFrame """
+    columns = ['name', 'shape', 'front_size', 'stopped', 'elapsed', 'iterations',
+               'iterations_per_second', 'evaluations_per_second']
+    return pd.DataFrame([{c: r[c] for c in columns} for r in results], columns=columns)
+
+
+if __name__ == '__main__':
+    sections_path, tas_path = default_paths()
+    tas = pd.read_csv(tas_path, encoding='utf-8-sig')
+    sections = pd.read_csv(sections_path, encoding='utf-8-sig')
+    what_if = [(with_max_assigned(tas, cap), sections,
+                {'name': f'max_assigned <= {cap}', 'time_limit': 30, 'stagnation': 20000})
+               for cap in (1, 2, 3)]
+    results = []
+    for result in run_scenarios(what_if):
+        print(f"{result['name']}: front {result['front_size']}, best {result['best']}, "
+              f"{result['iterations_per_second']:.0f} it/s")
+        results.append(result)
+    print(throughput(results).to_string(index=False))
@@ -0,0 +1,101 @@
+"""
+File: scheduler.py
+Description: Agent schedulers for Evo.evolve. A scheduler picks which
+            agent to run next and keeps per-agent statistics: calls, CPU
+            time, and how many offspring were accepted into the
+            non-dominated set.
+"""
+
+import random as rnd
+import pandas as pd
+
+
+class UniformScheduler:
+    """ Picks agents uniformly at random (the original behaviour).
+    fixed = agents that evolve runs on a fixed period: tracked in the
+            statistics, but never picked """
+
+    def __init__(self, names, fixed=()):
+        self.names = list(names)
+        self.fixed = [name for name in fixed if name not in self.names]
+        tracked = self.names + self.fixed
+        self.calls = dict.fromkeys(tracked, 0)
+        self.seconds = dict.fromkeys(tracked, 0.0)
+        self.accepted = dict.fromkeys(tracked, 0)
+
+    def pick(self):
+        return rnd.choice(self.names)
+
+    def probabilities(self):
+        """ Current sampling probability of each agent """
+        return dict.fromkeys(self.names, 1 / len(self.names))
+
+    def charge(self, name, seconds):
+        """ Record one call of agent name that took seconds of CPU time """
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def reward(self, name, accepted):
+        """ Record whether an offspring of agent name made the front """
+        self.accepted[name] = self.accepted.get(name, 0) + int(accepted)
+
+    def stats(self):
+        """ Per-agent statistics as a DataFrame indexed by agent name """
+        probs = self.probabilities()
+        rows = []
+        for name in self.calls:
+            calls, seconds, accepted = self.calls[name], self.seconds[name], self.accepted[name]
+            rows.append({
+                'agent': name,
+                'calls': calls,
+                'accepted': accepted,
+                'acceptance_rate': accepted / calls if calls else 0.0,
+                'seconds': seconds,
+                'us_per_call': 1e6 * seconds / calls if calls else 0.0,
+                'accepted_per_second': accepted / seconds if seconds else 0.0,
+                'probability': probs.get(name, 0.0),
+            })
+        return pd.DataFrame(rows).set_index('agent')
+
+
+class BanditScheduler(UniformScheduler):
+    """ Adaptive operator selection by probability matching: each agent is
+    sampled in proportion to its recent acceptances per CPU-second, with a
+    floor so that no agent is starved.
+    decay = per-call discount on past rewards and costs (recency)
+    floor = total probability mass spread uniformly over all agents """
+
+    def __init__(self, names, decay=0.995, floor=0.1, fixed=()):
+        super().__init__(names, fixed)
+        self.decay = decay
+        self.floor = floor
+        self.index = {name: i for i, name in enumerate(self.names)}
+        # Discounted rewards and costs, starting from a small optimistic prior
+        # (plain lists: with a handful of agents they beat NumPy here)
+        self.gains = [1.0] * len(self.names)
+        self.costs = [1e-4] * len(self.names)
+
+    def _weights(self):
+        rates = [gain / cost for gain, cost in zip(self.gains, self.costs)]
+        total = sum(rates)
+        base = self.floor / len(rates)
+        return [base + (1 - self.floor) * rate / total for rate in rates]
+
+    def probabilities(self):
+        return dict(zip(self.names, self._weights()))
+
+    def pick(self):
+        return rnd.choices(self.names, weights=self._weights())[0]
+
+    def charge(self, name, seconds):
+        super().charge(name, seconds)
+        if name not in self.index:  # a fixed-period agent
+            return
+        i = self.index[name]
+        self.gains[i] *= self.decay
+        self.costs[i] = self.costs[i] * self.decay + seconds
+
+    def reward(self, name, accepted):
+        super().reward(name, accepted)
+        if accepted and name in self.index:
+            self.gains[self.index[name]] += 1
@@ -0,0 +1,361 @@
+"""
+File: sparse.py
+Description: Sparse solution backend for large problems, where each TA
+            holds only a handful of the sections. A solution is the sorted
+            list of its assigned cells, so memory and the objectives below
+            scale with the number of assignments instead of TAs x sections.
+            The objectives, state and agents mirror those in assignta.py
+            and reuse its delta functions.
+"""
+
+from collections import defaultdict
+import numpy as np
+import assignta
+from assignta import Tally, count_dtype
+from problem import default_problem
+
+
+class SparseSolution:
+    """ An assignment as the sorted flat indices (ta * num_sections +
+    section) of its assigned cells. Per-TA section lists are contiguous
+    runs of cells; per-section TA counts come from one bincount """
+
+    __slots__ = ('shape', 'cells')
+
+    def __init__(self, shape, cells):
+        self.shape = tuple(shape)
+        self.cells = cells
+
+    @staticmethod
+    def _dtype(shape):
+        return np.int32 if shape[0] * shape[1] < 2**31 else np.int64
+
+    @classmethod
+    def from_dense(cls, solution):
+        """ Convert a dense (tas, sections) 0/1 matrix """
+        solution = np.asarray(solution)
+        return cls(solution.shape, np.flatnonzero(solution == 1).astype(cls._dtype(solution.shape)))
+
+    @classmethod
+    def from_cells(cls, shape, tas, sections):
+        """ Build from parallel arrays of assigned TAs and sections """
+        cells = np.asarray(tas, dtype=np.int64) * shape[1] + np.asarray(sections, dtype=np.int64)
+        return cls(shape, np.unique(cells).astype(cls._dtype(shape)))
+
+    def to_dense(self):
+        """ The equivalent dense uint8 matrix """
+        dense = np.zeros(self.shape, dtype=np.uint8)
+        dense.flat[self.cells] = 1
+        return dense
+
+    @property
+    def tas(self):
+        return self.cells // self.shape[1]
+
+    @property
+    def sections(self):
+        return self.cells % self.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.cells.nbytes
+
+    def __len__(self):
+        return len(self.cells)
+
+    def nonzero(self):
+        """ (tas, sections) of the assigned cells, like ndarray.nonzero """
+        return self.tas, self.sections
+
+    def tobytes(self):
+        """ Content bytes, for Evo's evaluation cache """
+        return self.cells.tobytes()
+
+    def copy(self):
+        return SparseSolution(self.shape, self.cells.copy())
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __getitem__(self, cell):
+        """ 1 if (ta, section) is assigned, else 0 """
+        ta, section = cell
+        key = ta * self.shape[1] + section
+        i = np.searchsorted(self.cells, key)
+        return int(i < len(self.cells) and self.cells[i] == key)
+
+    def ta_sections(self, ta):
+        """ Sections assigned to ta """
+        start = np.searchsorted(self.cells, ta * self.shape[1])
+        stop = np.searchsorted(self.cells, (ta + 1) * self.shape[1])
+        return self.cells[start:stop] - ta * self.shape[1]
+
+    def section_tas(self, section):
+        """ TAs assigned to section """
+        return self.tas[self.sections == section]
+
+    def apply(self, move):
+        """ A new solution with the (ta, section, value) cells of move set """
+        if not move:
+            return self.copy()
+        keys = np.array([ta * self.shape[1] + section for ta, section, _ in move], dtype=np.int64)
+        values = np.array([value for _, _, value in move], dtype=bool)
+        cells = np.setdiff1d(self.cells, keys[~values], assume_unique=True)
+        cells = np.union1d(cells, keys[values]).astype(self.cells.dtype)
+        return SparseSolution(self.shape, cells)
+
+
+# ---------------------------------------------------------------- objectives
+
+def _loads(solution, model):
+    """ Assignments per TA and TAs per section """
+    return (np.bincount(solution.tas, minlength=model.num_tas),
+            np.bincount(solution.sections, minlength=model.num_sections))
+
+def overallocation(solution, model=None):
+    """ Overallocation of a sparse solution """
+    model = model or default_problem()
+    ta_load, _ = _loads(solution, model)
+    return int(np.maximum(0, ta_load - model.max_assigned).sum())
+
+def conflicts(solution, model=None):
+    """ Conflicts of a sparse solution (same rule as assignta.conflicts) """
+    model = model or default_problem()
+    keys = solution.tas.astype(np.int64) * len(model.slots) + model.slot_of[solution.sections]
+    _, counts = np.unique(keys, return_counts=True)
+    return int((np.maximum(counts - 1, 0) - (counts > 2)).sum())
+
+def undersupport(solution, model=None):
+    """ Undersupport of a sparse solution """
+    model = model or default_problem()
+    _, section_load = _loads(solution, model)
+    return int(np.maximum(0, model.min_ta - section_load).sum())
+
+def unavailable(solution, model=None):
+    """ Unavailable assignments of a sparse solution """
+    model = model or default_problem()
+    return int(model.unavailable[solution.tas, solution.sections].sum())
+
+def unpreferred(solution, model=None):
+    """ Unpreferred assignments of a sparse solution """
+    model = model or default_problem()
+    return int(model.unpreferred[solution.tas, solution.sections].sum())
+
+OBJECTIVES = {
+    'overallocation': overallocation,
+    'conflicts': conflicts,
+    'undersupport': undersupport,
+    'unavailable': unavailable,
+    'unpreferred': unpreferred,
+}
+
+def make_tally(solution, model=None):
+    """ An assignta.Tally of a sparse solution for the assignta.DELTAS
+    functions, with the labs per TA per time slot kept as a dict of the
+    nonzero (ta, slot) counts. Copying it costs O(assignments) for that
+    dict plus the dense per-TA and per-section loads, kept in the
+    smallest dtype that fits (about 5.7 KB at 2000x850) """
+    model = model or default_problem()
+    ta_load, section_load = _loads(solution, model)
+    ta_load = ta_load.astype(count_dtype(model.num_sections))
+    section_load = section_load.astype(count_dtype(model.num_tas))
+    pairs, counts = np.unique(np.column_stack([solution.tas, model.slot_of[solution.sections]]),
+                              axis=0, return_counts=True)
+    slot_load = defaultdict(int, {(int(ta), int(slot)): int(c) for (ta, slot), c in zip(pairs, counts)})
+    return Tally(ta_load, section_load, slot_load, model)
+
+
+# -------------------------------------------------------------------- agents
+
+def random_solution(model=None):
+    """ A random sparse solution (see assignta.create_random_solution) """
+    return SparseSolution.from_dense(assignta.create_random_solution(model))
+
+def initial_population(n=50, model=None, greedy=0.2):
+    """ n sparse seeds (see assignta.initial_population), converted one at
+    a time so that only one dense matrix exists at once """
+    model = model or default_problem()
+    num_greedy = int(round(n * greedy))
+    seeds = [SparseSolution.from_dense(assignta.greedy_solution(model, ('preferred', 'capacity')[i % 2]))
+             for i in range(num_greedy)]
+    return seeds + [random_solution(model) for _ in range(n - num_greedy)]
+
+def _settle(parent, cells):
+    """ The move setting cells in order (later cells win), keeping only
+    the cells that differ from parent """
+    final = {}
+    for ta, section, value in cells:
+        final[(int(ta), int(section))] = int(value)
+    return [(ta, section, value) for (ta, section), value in final.items()
+            if parent[ta, section] != value]
+
+def _diff_move(parent, solution):
+    """ The (ta, section, value) changes from parent to solution """
+    num_sections = parent.shape[1]
+    removed = np.setdiff1d(parent.cells, solution.cells, assume_unique=True)
+    added = np.setdiff1d(solution.cells, parent.cells, assume_unique=True)
+    return [(int(c // num_sections), int(c % num_sections), 0) for c in removed] + \
+           [(int(c // num_sections), int(c % num_sections), 1) for c in added]
+
+def _result(parent, move):
+    """ An agent's (solution, move) result """
+    return parent.apply(move), move
+
+def _feasible_ta(solution, section, model, exclude=(), tries=20):
+    """ A random candidate TA for section that is unassigned there, under
+    its max_assigned and free in the section's time slot; sampled by
+    rejection so the cost does not grow with the # of TAs. None if no
+    such TA was found within tries """
+    candidates = model.candidates[section]
+    if len(candidates) == 0:
+        return None
+    slot = model.slot_of[section]
+    for ta in np.random.choice(candidates, tries):
+        if ta in exclude:
+            continue
+        held = solution.ta_sections(ta)
+        if len(held) < model.max_assigned[ta] and not np.any(model.slot_of[held] == slot):
+            return int(ta)
+    return None
+
+def swap_ta_agent(solutions, model=None):
+    """ Sparse swap_ta_agent: swap a TA of one section with a TA of another """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    solution = solutions[0]
+    section1, section2 = np.random.choice(solution.shape[1], 2, replace=False)
+    tas1, tas2 = solution.section_tas(section1), solution.section_tas(section2)
+    move = []
+    if len(tas1) > 0 and len(tas2) > 0:
+        ta1, ta2 = np.random.choice(tas1), np.random.choice(tas2)
+        move = _settle(solution, [(ta1, section1, 0), (ta1, section2, 1),
+                                  (ta2, section1, 1), (ta2, section2, 0)])
+    return _result(solution, move)
+
+def add_remove_agent(solutions, model=None):
+    """ Sparse add_remove_agent: add a random TA to a section, or remove one """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    solution = solutions[0]
+    section = np.random.randint(0, solution.shape[1])
+    assigned = solution.section_tas(section)
+    move = []
+    if len(assigned) < solution.shape[0] and np.random.random() < 0.5:
+        ta = np.random.randint(0, solution.shape[0])
+        while ta in assigned:
+            ta = np.random.randint(0, solution.shape[0])
+        move = [(ta, section, 1)]
+    elif len(assigned) > 0:
+        move = [(int(np.random.choice(assigned)), section, 0)]
+    return _result(solution, move)
+
+def optimize_section_agent(solutions, model=None):
+    """ Sparse optimize_section_agent: bring a section within its TA range """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    solution = solutions[0]
+    section = np.random.randint(0, solution.shape[1])
+    current = solution.section_tas(section)
+    move = []
+    if len(current) < model.min_ta[section]:
+        available = np.setdiff1d(model.candidates[section], current)
+        needed = min(model.min_ta[section] - len(current), len(available))
+        move = [(int(ta), section, 1) for ta in np.random.choice(available, needed, replace=False)]
+    elif len(current) > model.max_ta[section]:
+        extra = len(current) - model.max_ta[section]
+        move = [(int(ta), section, 0) for ta in np.random.choice(current, extra, replace=False)]
+    return _result(solution, move)
+
+def fix_conflicts_agent(solutions, model=None):
+    """ Sparse fix_conflicts_agent: drop a TA from one of two same-time labs """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    solution = solutions[0]
+    sections_at_time = model.slot_sections[np.random.randint(0, len(model.slots))]
+    move = []
+    if len(sections_at_time) > 1:
+        section1, section2 = np.random.choice(sections_at_time, 2, replace=False)
+        both = np.intersect1d(solution.section_tas(section1), solution.section_tas(section2))
+        if len(both) > 0:
+            move = [(int(np.random.choice(both)), int(np.random.choice([section1, section2])), 0)]
+    return _result(solution, move)
+
+def feasible_add_remove_agent(solutions, model=None):
+    """ Sparse feasible_add_remove_agent: add a feasible TA to a section with
+    room, or remove one """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    solution = solutions[0]
+    section = np.random.randint(0, solution.shape[1])
+    assigned = solution.section_tas(section)
+    move = []
+    if len(assigned) < model.max_ta[section] and np.random.random() < 0.5:
+        ta = _feasible_ta(solution, section, model)
+        if ta is not None:
+            move = [(ta, section, 1)]
+    elif len(assigned) > 0:
+        move = [(int(np.random.choice(assigned)), section, 0)]
+    return _result(solution, move)
+
+def feasible_replace_agent(solutions, model=None):
+    """ Sparse feasible_replace_agent: hand one of a section's labs to a
+    feasible other TA """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    solution = solutions[0]
+    section = np.random.randint(0, solution.shape[1])
+    assigned = solution.section_tas(section)
+    move = []
+    if len(assigned) > 0:
+        ta = _feasible_ta(solution, section, model, exclude=set(assigned.tolist()))
+        if ta is not None:
+            move = [(int(np.random.choice(assigned)), section, 0), (ta, section, 1)]
+    return _result(solution, move)
+
+def _crossover(parent, other, take_other):
+    """ Child with parent's cells where take_other is False and other's
+    where it is True (take_other: one flag per cell of each parent) """
+    cells = np.union1d(parent.cells[~take_other(parent)], other.cells[take_other(other)])
+    child = SparseSolution(parent.shape, cells.astype(parent.cells.dtype))
+    return child, _diff_move(parent, child)
+
+def section_crossover_agent(solutions, model=None):
+    """ Sparse section_crossover_agent: each section's TAs from either parent """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    take = np.random.random(solutions[0].shape[1]) < 0.5
+    return _crossover(solutions[0], solutions[-1], lambda sol: take[sol.sections])
+
+def ta_crossover_agent(solutions, model=None):
+    """ Sparse ta_crossover_agent: each TA's sections from either parent """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    take = np.random.random(solutions[0].shape[0]) < 0.5
+    return _crossover(solutions[0], solutions[-1], lambda sol: take[sol.tas])
+
+def best_column_crossover_agent(solutions, model=None):
+    """ Sparse best_column_crossover_agent: each section's TAs from the parent
+    scoring lower on unavailable + unpreferred + undersupport there """
+    model = model or default_problem()
+    if not solutions:
+        return random_solution(model)
+    parent, other = solutions[0], solutions[-1]
+
+    def penalty(sol):
+        tas, sections = sol.tas, sol.sections
+        weights = (model.unavailable[tas, sections] + model.unpreferred[tas, sections]).astype(float)
+        load = np.bincount(sections, minlength=model.num_sections)
+        return np.bincount(sections, weights, minlength=model.num_sections) + \
+            np.maximum(0, model.min_ta - load)
+
+    ours, theirs = penalty(parent), penalty(other)
+    take = (theirs < ours) | ((theirs == ours) & (np.random.random(model.num_sections) < 0.5))
+    return _crossover(parent, other, lambda sol: take[sol.sections])
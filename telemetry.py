@@ -0,0 +1,61 @@
+"""
+File: telemetry.py
+Description: Progress reporters for Evo.evolve. Each reporter receives a
+            compact status dict (see Evo.status) every status interval
+            and once more at the end of the run.
+"""
+
+import json
+import sys
+
+
+class StatusLine:
+    """ Prints one compact summary line per report """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def report(self, evo, stats):
+        stream = self.stream or sys.stdout
+        best = ' '.join(f"{name}={score:g}" for name, score in stats['best'].items())
+        hv = stats['hypervolume']
+        line = (f"[{stats['elapsed']:7.1f}s] it {stats['iteration']} "
+                f"({stats['rate']:.0f}/s)  front {stats['front']}  best {best}")
+        if hv is not None:
+            line += f"  hv {hv:.4g}"
+        if stats['final']:
+            line = "Evolution completed: " + line
+            if stats.get('stopped'):
+                line += f"  (stopped: {stats['stopped']})"
+        print(line, file=stream, flush=True)
+
+
+class JsonLines:
+    """ Writes each report as one JSON object per line to a file or stream """
+
+    def __init__(self, target):
+        self.target = target
+        self.stream = None
+
+    def report(self, evo, stats):
+        if self.stream is None:
+            self.stream = open(self.target, 'a') if isinstance(self.target, str) \
+                else self.target
+        self.stream.write(json.dumps(stats) + "\n")
+        self.stream.flush()
+        if stats['final'] and isinstance(self.target, str):
+            self.stream.close()
+            self.stream = None
+
+
+class PopulationDump:
+    """ Prints every solution in the population (slow; for debugging).
+    final_only = True to dump only once, at the end of the run """
+
+    def __init__(self, stream=None, final_only=True):
+        self.stream = stream
+        self.final_only = final_only
+
+    def report(self, evo, stats):
+        if stats['final'] or not self.final_only:
+            print(evo, file=self.stream or sys.stdout, flush=True)
@@ -14,8 +14,26 @@ from assignta import (
     conflicts,
     undersupport,
     unavailable,
-    unpreferred
+    unpreferred,
+    problem,
+    Tally,
+    DELTAS,
+    pack_solution,
+    unpack_solution,
+    solution_key,
+    create_random_solution,
+    feasible_add_remove_agent,
+    feasible_replace_agent,
+    feasible_swap_agent,
+    section_crossover_agent,
+    ta_crossover_agent,
+    best_column_crossover_agent,
+    local_search_agent,
+    create_random_solutions,
+    greedy_solution,
+    initial_population
 )
+from problem import ProblemModel
 
 class Evo:
 
@@ -189,5 +207,171 @@ def test_unpreferred():
     solution3 = load_test_data(3)
     assert unpreferred(solution3) == 17
 
+def test_problem_model():
+    """Test the precompiled problem model"""
+    assert problem.shape == (40, 17)
+    # Every cell is either available or unavailable, and only
+    # available cells can be unpreferred
+    assert np.all(problem.available + problem.unavailable == 1)
+    assert np.all(problem.unpreferred <= problem.available)
+    # Every section belongs to exactly one time slot
+    assert sum(len(s) for s in problem.slot_sections) == problem.num_sections
 
+def test_conflicts_batch():
+    """Test conflicts on a stacked batch of solutions"""
+    batch = np.stack([load_test_data(i) for i in (1, 2, 3)])
+    assert list(conflicts(batch)) == [7, 5, 2]
 
+def test_deltas():
+    """Test incremental scoring against full rescoring"""
+    objectives = {'overallocation': overallocation, 'conflicts': conflicts,
+                  'undersupport': undersupport, 'unavailable': unavailable,
+                  'unpreferred': unpreferred}
+    rng = np.random.default_rng(0)
+    solution = load_test_data(1)
+    tally = Tally.from_solution(solution)
+    assert tally.ta_load.dtype == tally.slot_load.dtype == np.int8  # compact per-member state
+    scores = {name: f(solution) for name, f in objectives.items()}
+    for _ in range(200):
+        ta, section = rng.integers(40), rng.integers(17)
+        cell = (ta, section, 1 - int(solution[ta, section]))
+        scores = {name: DELTAS[name](score, tally, cell) for name, score in scores.items()}
+        tally.apply(cell)
+        solution[ta, section] = cell[2]
+        assert scores == {name: f(solution) for name, f in objectives.items()}
+
+def test_compact_solution():
+    """Test objectives on uint8/bool solutions and bit packing"""
+    solution = load_test_data(2)
+    compact = solution.astype(np.uint8)
+    assert pack_solution(compact).nbytes == 40 * 3
+    assert np.array_equal(unpack_solution(pack_solution(compact), 17), compact)
+    assert solution_key(compact) == solution_key(solution.astype(bool))
+    for f in (overallocation, conflicts, undersupport, unavailable, unpreferred):
+        assert f(compact) == f(solution) == f(solution.astype(bool))
+
+def test_synthetic_problem():
+    """Test the seeded synthetic problem generator"""
+    model = ProblemModel.synthetic(60, 25, seed=1)
+    assert model.shape == (60, 25)
+    assert np.array_equal(model.unpreferred, ProblemModel.synthetic(60, 25, seed=1).unpreferred)
+    solution = create_random_solution(model)
+    assert conflicts(solution, model) == conflicts(solution[None], model)[0]
+
+def test_feasible_agents():
+    """Feasibility-aware moves never add unavailable, over-capacity or
+    same-time-slot assignments"""
+    np.random.seed(0)
+    for agent in (feasible_add_remove_agent, feasible_replace_agent, feasible_swap_agent):
+        solution = create_random_solution()
+        for _ in range(200):
+            new, move = agent([solution])
+            for f in (unavailable, overallocation, conflicts):
+                assert f(new) <= f(solution)
+            assert len(move) == int(np.sum(new != solution))
+            solution = new
+
+def test_crossover_agents():
+    """Crossover children mix their parents' columns or rows, and their
+    moves rebuild them from the first parent"""
+    np.random.seed(0)
+    parents = [load_test_data(1).astype(np.uint8), load_test_data(3).astype(np.uint8)]
+    for agent in (section_crossover_agent, best_column_crossover_agent):
+        child, move = agent(parents)
+        from_first = np.all(child == parents[0], axis=0)
+        assert np.all(from_first | np.all(child == parents[1], axis=0))
+        rebuilt = parents[0].copy()
+        for ta, section, value in move:
+            rebuilt[ta, section] = value
+        assert np.array_equal(rebuilt, child)
+    child, move = ta_crossover_agent(parents)
+    assert np.all(np.all(child == parents[0], axis=1) | np.all(child == parents[1], axis=1))
+    # The best-column child is no worse than either parent on the per-section objectives
+    child, _ = best_column_crossover_agent(parents)
+    assert unavailable(child) + unpreferred(child) + undersupport(child) <= \
+        min(unavailable(p) + unpreferred(p) + undersupport(p) for p in parents)
+
+def test_local_search_agent():
+    """Local search ends in a local optimum of its weighted objective and
+    never makes it worse"""
+    np.random.seed(0)
+    weights = np.array([1.0, 1.0, 1.0, 1.0, 0.5])
+    objectives = (overallocation, conflicts, undersupport, unavailable, unpreferred)
+    weighted = lambda sol: sum(w * f(sol) for w, f in zip(weights, objectives))
+    solution = create_random_solution()
+    polished, move = local_search_agent([solution], weights=weights, max_steps=1000)
+    assert weighted(polished) < weighted(solution)
+    assert len(move) == int(np.sum(polished != solution))
+    for ta in range(40):
+        for section in range(17):
+            flipped = polished.copy()
+            flipped[ta, section] = 1 - flipped[ta, section]
+            assert weighted(flipped) >= weighted(polished)
+
+def test_seeding():
+    """Random seeds respect each section's TA range and candidates; greedy
+    seeds add no unavailable, over-capacity or same-slot assignments"""
+    np.random.seed(0)
+    batch = create_random_solutions(200)
+    assert batch.shape == (200, 40, 17) and batch.dtype == np.uint8
+    counts = batch.sum(axis=1)
+    capped = np.minimum(problem.max_ta, [len(c) for c in problem.candidates])
+    assert np.all(counts <= capped) and np.all(counts >= np.minimum(problem.min_ta, capped))
+    assert unavailable(batch).sum() == 0
+    for strategy in ('preferred', 'capacity'):
+        seed = greedy_solution(strategy=strategy)
+        assert unavailable(seed) == overallocation(seed) == conflicts(seed) == 0
+    assert len(initial_population(20)) == 20
+    assert len(initial_population(2)) == 2 and len(initial_population(5, greedy=0)) == 5
+
+def test_sparse_backend():
+    """Sparse objectives, tallies and agent moves agree with the dense ones"""
+    import sparse
+    np.random.seed(0)
+    for i in (1, 2, 3):
+        dense = load_test_data(i)
+        solution = sparse.SparseSolution.from_dense(dense)
+        assert np.array_equal(solution.to_dense(), dense)
+        dense_objectives = (overallocation, conflicts, undersupport, unavailable, unpreferred)
+        for f, dense_f in zip(sparse.OBJECTIVES.values(), dense_objectives):
+            assert f(solution) == dense_f(dense)
+    parent, other = sparse.random_solution(), sparse.random_solution()
+    for agent in (sparse.swap_ta_agent, sparse.feasible_replace_agent,
+                  sparse.section_crossover_agent, sparse.best_column_crossover_agent):
+        child, move = agent([parent, other])
+        tally = sparse.make_tally(parent)
+        scores = {name: f(parent) for name, f in sparse.OBJECTIVES.items()}
+        for cell in move:
+            scores = {name: DELTAS[name](score, tally, cell) for name, score in scores.items()}
+            tally.apply(cell)
+        assert scores == {name: f(child) for name, f in sparse.OBJECTIVES.items()}
+        assert np.array_equal(parent.apply(move).cells, child.cells)
+
+def test_problem_loader(tmp_path):
+    """CSV inputs are validated, and the parsed arrays are cached in a
+    sidecar that is reused until the files change"""
+    import pandas as pd
+    sections = pd.read_csv('sections.csv', encoding='utf-8-sig')
+    tas = pd.read_csv('tas.csv', encoding='utf-8-sig')
+    sections.to_csv(tmp_path / 'sections.csv', index=False)
+    tas.to_csv(tmp_path / 'tas.csv', index=False)
+    paths = (str(tmp_path / 'sections.csv'), str(tmp_path / 'tas.csv'))
+    first = ProblemModel.from_csv(*paths)
+    assert list(tmp_path.glob('.*.problem.npz'))
+    cached = ProblemModel.from_csv(*paths)
+    for name, array in first.to_arrays().items():
+        assert np.array_equal(getattr(cached, name), array)
+    assert np.array_equal(cached.slot_of, problem.slot_of)
+
+    bad = tas.copy()
+    bad.iloc[0, 3] = 'X'
+    try:
+        ProblemModel(sections, bad)
+        assert False, "unknown codes should be rejected"
+    except ValueError as e:
+        assert 'X' in str(e)
+    try:
+        ProblemModel(sections.iloc[:-1], tas)
+        assert False, "mismatched shapes should be rejected"
+    except ValueError:
+        pass
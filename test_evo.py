@@ -0,0 +1,401 @@
+"""
+File: test_evo.py
+Description: Tests for the evolutionary framework using the TA objectives
+"""
+
+import numpy as np
+from evo import Evo
+from assignta import OBJECTIVES, DELTAS, Tally, unavailable, add_remove_agent, swap_ta_agent
+
+def load_test_data(test_num):
+    """Load test data from test files"""
+    return np.loadtxt(f'test{test_num}.csv', delimiter=',')
+
+def make_evo(batch=True):
+    """An Evo with the five TA objectives registered"""
+    evo = Evo()
+    for name, f in OBJECTIVES.items():
+        evo.add_objective(name, f, batch=batch)
+    return evo
+
+def test_evaluate_batch():
+    """Batch scoring matches one-at-a-time scoring"""
+    solutions = [load_test_data(i) for i in (1, 2, 3)]
+    single = make_evo(batch=False)
+    for sol in solutions:
+        single.add_solution(sol)
+    batched = make_evo()
+    batched.add_solutions(solutions)
+    assert list(single.pop) == list(batched.pop)
+    assert dict(batched.evaluate_batch(solutions)[0])['conflicts'] == 7
+
+def test_evaluate_batch_fallback():
+    """Objectives without batch support are called per solution"""
+    evo = make_evo()
+    evo.add_objective('unavailable', lambda sol: unavailable(sol))
+    keys = evo.evaluate_batch([load_test_data(i) for i in (1, 2, 3)])
+    assert [dict(key)['unavailable'] for key in keys] == [59, 57, 34]
+
+def test_delta_evaluation():
+    """Agent moves scored incrementally match full rescoring"""
+    evo = make_evo()
+    for name, f in OBJECTIVES.items():
+        evo.add_objective(name, f, batch=True, delta=DELTAS[name])
+    evo.set_state(Tally.from_solution)
+    evo.add_agent('add_remove', add_remove_agent)
+    evo.add_agent('swap_ta', swap_ta_agent)
+    evo.add_solution(load_test_data(2))
+    for i in range(300):
+        evo.run_agent('add_remove' if i % 2 else 'swap_ta')
+    for key, sol in evo.pop.items():
+        assert key == tuple((name, f(sol)) for name, f in OBJECTIVES.items())
+
+def test_remove_dominated_engines():
+    """Every non-dominated filtering engine keeps the same front"""
+    rng = np.random.default_rng(1)
+    keys = [tuple((f'obj{j}', int(s)) for j, s in enumerate(row))
+            for row in rng.integers(0, 10, size=(300, 3))]
+    fronts = []
+    for nds in ('reduce', 'sort', 'pairwise'):
+        evo = Evo(nds=nds)
+        evo.pop = dict.fromkeys(keys)
+        evo.remove_dominated()
+        fronts.append(set(evo.pop))
+    assert fronts[0] == fronts[1] == fronts[2]
+
+def test_archive_mode():
+    """In archive mode the population is always non-dominated"""
+    evo = Evo(archive=True)
+    for name, f in OBJECTIVES.items():
+        evo.add_objective(name, f, batch=True, delta=DELTAS[name])
+    evo.set_state(Tally.from_solution)
+    evo.add_agent('add_remove', add_remove_agent)
+    evo.add_solutions([load_test_data(i) for i in (1, 2, 3)])
+    for _ in range(300):
+        evo.run_agent('add_remove')
+        keys = set(evo.pop)
+        evo.remove_dominated()
+        assert set(evo.pop) == keys
+
+def test_islands():
+    """Island fronts are merged into one non-dominated population"""
+    from islands import run_islands
+    from profiler import setup_optimizer
+    evo = run_islands(setup_optimizer, islands=2, time_limit=0.4, migrate_every=0.2)
+    keys = set(evo.pop)
+    assert keys
+    evo.remove_dominated()
+    assert set(evo.pop) == keys
+
+def test_island_seeding():
+    """Islands start their first epoch from a seeded population"""
+    from islands import _run_epoch
+    from profiler import setup_optimizer
+    from assignta import initial_population
+    requested = []
+    seeds = lambda n: requested.append(n) or initial_population(n)
+    assert _run_epoch(setup_optimizer, 0, [], 0.05, seeds, population=10)
+    assert requested == [10]
+
+def test_reporters():
+    """evolve reports compact JSON lines instead of dumping the population"""
+    import io, json
+    import telemetry
+    from profiler import setup_optimizer
+    evo = setup_optimizer()
+    evo.add_solution(load_test_data(3))
+    lines, status = io.StringIO(), io.StringIO()
+    evo.evolve(time_limit=0.3, status=500,
+               reporters=[telemetry.JsonLines(lines), telemetry.StatusLine(status)])
+    reports = [json.loads(line) for line in lines.getvalue().splitlines()]
+    assert reports[-1]['final'] and reports[-1]['front'] == len(evo.pop)
+    assert set(reports[-1]['best']) == set(OBJECTIVES)
+    assert reports[-1]['hypervolume'] > 0
+    assert len(status.getvalue().splitlines()) == len(reports)
+
+def test_evaluation_cache():
+    """Repeated solutions hit the cache and are not re-added"""
+    evo = make_evo()
+    calls = []
+    evo.add_objective('unavailable', lambda sol: calls.append(1) or unavailable(sol))
+    solution = load_test_data(1)
+    assert evo.add_solution(solution)
+    evo.pop.clear()
+    assert evo.add_solution(solution.copy())  # cached score, re-added
+    assert not evo.add_solution(solution.astype(np.uint8))  # same bits, any dtype
+    assert len(calls) == 1
+    assert evo.cache_stats() == {'hits': 2, 'misses': 1, 'duplicates': 1, 'size': 1}
+
+def test_evaluation_cache_lru():
+    """The cache keeps only the most recently used evaluations"""
+    evo = Evo(cache_size=2)
+    evo.add_objective('unavailable', unavailable)
+    solutions = [load_test_data(i) for i in (1, 2, 3)]
+    evo.add_solutions(solutions)
+    assert len(evo.cache) == 2
+    evo.pop.clear()
+    evo.add_solution(solutions[0])
+    assert evo.cache_stats()['misses'] == 4
+    evo.add_objective('conflicts', OBJECTIVES['conflicts'])
+    evo.pop.clear()
+    assert [name for name, _ in evo.add_solution(solutions[0])] == ['unavailable', 'conflicts']
+
+def test_bandit_scheduler():
+    """The bandit shifts sampling toward agents that make the front"""
+    from scheduler import BanditScheduler
+    bandit = BanditScheduler(['good', 'bad'])
+    for _ in range(200):
+        for name in ('good', 'bad'):
+            bandit.charge(name, 1e-4)
+            bandit.reward(name, name == 'good')
+    probs = bandit.probabilities()
+    assert probs['good'] > 0.9 and probs['bad'] >= 0.05
+    stats = bandit.stats()
+    assert stats.loc['good', 'acceptance_rate'] == 1.0
+    assert stats.loc['bad', 'accepted'] == 0
+
+def test_agent_stats():
+    """evolve exposes per-agent stats at the end of a run"""
+    from scheduler import BanditScheduler
+    from profiler import setup_optimizer
+    evo = setup_optimizer()
+    evo.add_solution(load_test_data(3))
+    import pytest
+    with pytest.raises(ValueError):  # local_search runs on a period, not by pick
+        evo.evolve(time_limit=0.3, reporters=[], scheduler=BanditScheduler(evo.agents))
+    picked = [name for name in evo.agents if name not in evo.periodic]
+    evo.evolve(time_limit=0.3, reporters=[],
+               scheduler=BanditScheduler(picked, fixed=evo.periodic))
+    stats = evo.agent_stats()
+    assert set(stats.index) == set(evo.agents)
+    assert stats['accepted'].sum() > 0
+    assert (stats['accepted'] <= stats['calls']).all()
+
+def test_timings():
+    """Agents, objectives and remove_dominated are timed"""
+    from profiler import setup_optimizer
+    evo = setup_optimizer()
+    evo.add_solution(load_test_data(1))
+    for _ in range(50):
+        evo.run_agent('swap_ta')
+    evo.remove_dominated()
+    counters = evo.counters
+    assert counters[('agent', 'swap_ta')][0] == 50
+    assert counters[('objective', 'conflicts')][0] == 1
+    assert counters[('remove_dominated', 'auto')][0] == 1
+    evo.add_solutions([load_test_data(i) for i in (2, 3)])
+    assert counters[('objective', 'conflicts')][0] == 3  # one per batched solution
+    table = evo.timings()
+    assert list(table.columns) == ['kind', 'name', 'calls', 'total_ms', 'us_per_call']
+    assert table['total_ms'].is_monotonic_decreasing
+
+def test_stopping_criteria():
+    """evolve stops on iterations, evaluations, stagnation or a target"""
+    def fresh():
+        evo = make_evo()
+        evo.add_agent('add_remove', add_remove_agent)
+        evo.add_solution(load_test_data(1))
+        return evo
+    evo = fresh()
+    assert evo.evolve(time_limit=None, max_iter=250, reporters=[]) == 'max_iter'
+    assert sum(evo.scheduler.calls.values()) == 250
+    evo = fresh()
+    start = evo.evaluations
+    assert evo.evolve(max_evals=40, reporters=[]) == 'max_evals'
+    assert evo.evaluations - start == 40
+    evo = fresh()
+    assert evo.evolve(target={name: 1000 for name in OBJECTIVES}, reporters=[]) == 'target'
+    evo = fresh()
+    evo.add_agent('add_remove', lambda sols: sols[0])  # never changes anything
+    assert evo.evolve(stagnation=500, reporters=[]) == 'stagnation'
+    assert sum(evo.scheduler.calls.values()) <= 601
+
+def test_checkpoint(tmp_path):
+    """A saved population loads back with the same keys and solutions"""
+    evo = make_evo()
+    evo.add_agent('add_remove', add_remove_agent)
+    evo.add_solution(load_test_data(1).astype(np.uint8))
+    path = str(tmp_path / 'pop.npz')
+    evo.evolve(max_iter=300, reporters=[], checkpoint=path)
+    resumed = make_evo()
+    assert resumed.load_checkpoint(path) == len(evo.pop)
+    assert list(resumed.pop) == list(evo.pop)
+    for key, sol in evo.pop.items():
+        assert resumed.pop[key].dtype == sol.dtype and np.array_equal(resumed.pop[key], sol)
+    lazy = Evo()
+    for name, f in OBJECTIVES.items():
+        lazy.add_objective(name, f, batch=True, delta=DELTAS[name])
+    lazy.set_state(Tally.from_solution)
+    lazy.add_agent('add_remove', add_remove_agent)
+    lazy.load_checkpoint(path)
+    assert not lazy.states  # built on first use as a parent
+    for _ in range(20):
+        key = lazy.run_agent('add_remove')
+        assert key is None or key == lazy._score(lazy.pop[key])
+    assert ('delta', 'all objectives') in lazy.counters
+    other = Evo()
+    other.add_objective('unavailable', unavailable)
+    try:
+        other.load_checkpoint(path)
+        assert False, "mismatched objectives should be rejected"
+    except ValueError:
+        pass
+
+def test_checkpoint_sparse(tmp_path):
+    """Sparse populations autosave during evolve and load back"""
+    from profiler import setup_sparse_optimizer
+    import sparse
+    evo = setup_sparse_optimizer()
+    evo.add_solutions(list(sparse.initial_population(10)))
+    path = str(tmp_path / 'sparse.npz')
+    evo.evolve(time_limit=None, max_iter=200, reporters=[], checkpoint=path)
+    resumed = setup_sparse_optimizer()
+    assert resumed.load_checkpoint(path) == len(evo.pop)
+    for key, sol in evo.pop.items():
+        assert resumed.pop[key].shape == sol.shape and np.array_equal(resumed.pop[key].cells, sol.cells)
+
+def test_checkpoint_archive(tmp_path):
+    """A front loads into an archive-mode Evo; other populations are filtered"""
+    saved = Evo(archive=True)
+    for name, f in OBJECTIVES.items():
+        saved.add_objective(name, f, batch=True, delta=DELTAS[name])
+    saved.set_state(Tally.from_solution)
+    saved.add_agent('add_remove', add_remove_agent)
+    saved.add_solutions([load_test_data(i) for i in (1, 2, 3)])
+    saved.evolve(time_limit=None, max_iter=300, reporters=[])
+    front_path = str(tmp_path / 'front.npz')
+    saved.save_checkpoint(front_path)
+    resumed = Evo(archive=True)
+    resumed.load_checkpoint(front_path)
+    assert set(resumed.pop) == set(saved.pop) == resumed.front.members
+    dominated = load_test_data(2)
+    dominated[0, 0] = 1  # one more over-capacity, unavailable lab than test 2
+    mixed = make_evo()
+    mixed.add_solutions([load_test_data(i) for i in (1, 2, 3)] + [dominated])
+    mixed_path = str(tmp_path / 'mixed.npz')
+    mixed.save_checkpoint(mixed_path)
+    filtered = Evo(archive=True)
+    filtered.load_checkpoint(mixed_path)
+    mixed.remove_dominated()
+    assert len(filtered.pop) == 3
+    assert set(filtered.pop) == set(mixed.pop) == filtered.front.members
+
+def test_export_population(tmp_path):
+    """Exported rows round-trip each solution's scores and assignments"""
+    import json
+    import pandas as pd
+    from export import export_population
+    evo = make_evo()
+    evo.add_solutions([load_test_data(i) for i in (1, 2, 3)])
+    path = str(tmp_path / 'front.jsonl')
+    assert export_population(evo, path, chunk=2) == 3
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    export_population(evo, str(tmp_path / 'front.csv'))
+    csv = pd.read_csv(tmp_path / 'front.csv')
+    for row, (key, sol) in zip(rows, evo.pop.items()):
+        assert {name: row[name] for name, _ in key} == dict(key)
+        rebuilt = np.zeros_like(sol)
+        rebuilt[row['tas'], row['sections']] = 1
+        assert np.array_equal(rebuilt, sol)
+    assert csv['tas'][0] == ' '.join(map(str, rows[0]['tas']))
+    assert list(csv['conflicts']) == [row['conflicts'] for row in rows]
+
+def test_periodic_agent():
+    """Agents added with every=N run on that period and are never picked"""
+    evo = make_evo()
+    evo.add_agent('add_remove', add_remove_agent)
+    evo.add_agent('polish', lambda sols: sols[0], every=50)
+    evo.add_solution(load_test_data(1))
+    evo.evolve(time_limit=None, max_iter=200, reporters=[])
+    stats = evo.agent_stats()
+    assert stats.loc['add_remove', 'calls'] == 200
+    assert stats.loc['polish', 'calls'] == 3  # at iterations 50, 100 and 150
+    assert stats.loc['polish', 'probability'] == 0.0
+
+def test_front_metrics():
+    """Hypervolume, spacing, spread and IGD on small known fronts, and
+    from an Evo population's keys"""
+    import metrics
+    line = np.array([[0, 4], [1, 3], [2, 2], [3, 1], [4, 0]], dtype=float)
+    assert metrics.hypervolume(line, [5, 5]) == 15.0
+    assert abs(metrics.hypervolume_mc(line, [5, 5], samples=20000) - 15.0) < 1.0
+    assert metrics.spacing(line) == 0.0 and metrics.spread(line, line) == 0.0
+    assert metrics.igd(line, line) == 0.0
+    assert metrics.igd(line[:2], line) > 0 and metrics.spread(line[:2], line) > 0
+    skipped = metrics.front_metrics(line, neighbours_max=4)  # O(n^2) metrics skipped
+    assert skipped['spacing'] is None and skipped['spread'] is None
+    evo = make_evo()
+    evo.add_solutions([load_test_data(i) for i in (1, 2, 3)])
+    quality = evo.front_metrics(reference=[100] * 5, reference_front=evo.scores()[1])
+    assert quality == metrics.front_metrics(evo.pop.keys(), [100] * 5, evo.scores()[1])
+    assert quality['size'] == 3 and quality['igd'] == 0.0 and quality['hypervolume'] > 0
+
+def test_scenarios():
+    """Scenarios run concurrently and each streams back its front and throughput"""
+    import pandas as pd
+    from scenarios import run_scenarios, with_max_assigned, drop_sections, throughput
+    tas = pd.read_csv('tas.csv', encoding='utf-8-sig')
+    sections = pd.read_csv('sections.csv', encoding='utf-8-sig')
+    fewer_tas, fewer_sections = drop_sections(tas, sections, [0, 1])
+    scenarios = [(with_max_assigned(tas, 1), sections, {'name': 'capped', 'time_limit': 0.5}),
+                 (fewer_tas, fewer_sections, {'name': 'dropped', 'time_limit': 0.5}),
+                 (None, None, {'name': 'sparse', 'time_limit': None, 'max_iter': 200,
+                               'backend': 'sparse'})]
+    results = {r['name']: r for r in run_scenarios(scenarios, workers=2)}
+    assert results['dropped']['shape'] == [40, 15]
+    assert results['sparse']['stopped'] == 'max_iter'
+    assert all(r['front'] and r['iterations_per_second'] > 0 for r in results.values())
+    assert len(throughput(results.values())) == 3
+
+def test_scalar_mode():
+    """Weighted and lexicographic modes keep a bounded elite of the
+    best-ranked solutions, with no dominance pruning"""
+    import pytest
+    solutions = [load_test_data(i) for i in (1, 2, 3)]
+    evo = make_evo()
+    evo.add_solutions(solutions)
+    totals = {sum(score for _, score in key): key for key in evo.pop}
+    weighted = make_evo()
+    weighted.weights, weighted.elite = [1] * 5, 2
+    weighted.add_solutions(solutions)
+    assert len(weighted.pop) == 2 and max(totals) not in {sum(s for _, s in k) for k in weighted.pop}
+    assert weighted.best()[0] == totals[min(totals)] == evo.best()[0]
+    lex = make_evo()
+    lex.lexicographic = ['conflicts', 'unpreferred']
+    lex.add_solutions(solutions)
+    assert dict(lex.best()[0])['conflicts'] == min(dict(k)['conflicts'] for k in evo.pop)
+    lex.add_agent('add_remove', add_remove_agent)
+    lex.evolve(time_limit=None, max_iter=300, reporters=[])
+    assert ('remove_dominated', 'auto') not in lex.counters and len(lex.pop) <= lex.elite
+    with pytest.raises(ValueError):
+        Evo(archive=True, weights=[1] * 5)
+
+def test_scalar_rerank():
+    """A populated elite is re-ranked after pruning or a new objective"""
+    solutions = [load_test_data(i) for i in (1, 2, 3)]
+    evo = Evo(weights={'unavailable': 1}, elite=2)
+    evo.add_objective('unavailable', unavailable, batch=True)
+    evo.add_solutions(solutions[:2])
+    evo.remove_dominated()
+    evo.add_solution(solutions[2])
+    assert len(evo.pop) == 2 and len(evo.ranking) == 2
+    lex = Evo(lexicographic=['unavailable'])
+    lex.add_objective('unavailable', unavailable, batch=True)
+    lex.add_solutions(solutions[:2])
+    lex.add_objective('conflicts', OBJECTIVES['conflicts'], batch=True)
+    assert all(len(key) == 2 for key in lex.pop)  # rescored on every objective
+    lex.add_solution(solutions[2])
+    assert len(lex.ranking) == len(lex.pop)
+
+def test_add_objective_rescores():
+    """A populated Evo is rescored when an objective is added"""
+    solutions = [load_test_data(i) for i in (1, 2, 3)]
+    for archive in (False, True):
+        evo = Evo(archive=archive)
+        evo.add_objective('unavailable', unavailable)
+        evo.add_solution(solutions[0])
+        evo.add_objective('conflicts', OBJECTIVES['conflicts'])
+        evo.add_solution(solutions[1])
+        evo.remove_dominated()
+        assert evo.pop and all(len(key) == 2 for key in evo.pop)